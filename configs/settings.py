@@ -1,4 +1,6 @@
+from functools import lru_cache
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -14,6 +16,100 @@ class Settings(BaseSettings):
         .parent.parent.joinpath("logs")
         .joinpath("app.log")
     )
+    # 로그에 남길 페이로드(질문, SQL, 답변 등)의 수준
+    # - off: 길이와 해시만 기록
+    # - truncated: log_payload_max_chars 까지만 기록
+    # - full: 원문 그대로 기록
+    log_payload_mode: Literal["off", "truncated", "full"] = Field(
+        default="truncated"
+    )
+    log_payload_max_chars: int = Field(default=200, ge=0)
+    # 샘플링된 요청의 전체 페이로드를 별도 파일에 비동기로 기록
+    audit_log_path: Path = Field(
+        default=Path(__file__)
+        .parent.parent.joinpath("logs")
+        .joinpath("audit.log")
+    )
+    audit_log_sample_rate: float = Field(default=0.01, ge=0.0, le=1.0)
+    # LIMIT이 없는 생성 쿼리에 붙일 기본 LIMIT (0이면 주입하지 않음)
+    sql_default_limit: int = Field(default=1000, ge=0)
+    # 결과 요약 단계: 실행 결과가 이 토큰 수를 넘으면 로컬에서 요약한 뒤
+    # 통계와 일부 표본만 LLM에 전달
+    synthesis_token_budget: int = Field(default=2000, ge=0)
+    result_sample_rows: int = Field(default=20, ge=1)
+    result_top_k: int = Field(default=5, ge=1)
+    # 대화 메모리(LangGraph checkpointer) 저장소
+    checkpointer_backend: Literal["memory", "postgres"] = Field(
+        default="memory"
+    )
+    # postgres checkpointer 쓰기 배치 설정
+    checkpoint_flush_interval_ms: int = Field(default=50, ge=1)
+    checkpoint_max_batch_size: int = Field(default=100, ge=1)
+    # 플러시되지 않은 행이 이만큼 쌓이면 쓰기 호출이 직접 플러시
+    # (DB 장애 중 버퍼가 무한히 커지지 않도록)
+    checkpoint_max_pending_rows: int = Field(default=10_000, ge=1)
+    # 마지막으로 사용한 뒤 이 시간이 지난 대화 스레드의 checkpoint를 삭제
+    # (0이면 삭제하지 않음)
+    checkpoint_thread_ttl_s: float = Field(default=86_400.0, ge=0.0)
+    # memory 저장소에 유지할 최대 스레드 수 (가장 오래 사용하지 않은
+    # 스레드부터 삭제)
+    checkpoint_memory_max_threads: int = Field(default=1000, ge=1)
+    # postgres 저장소에서 만료된 스레드를 찾아 삭제하는 주기
+    checkpoint_expiry_interval_s: float = Field(default=300.0, gt=0.0)
+    # 이 크기를 넘는 채널 값은 checkpoint 밖에 내용 해시로 저장
+    checkpoint_inline_max_bytes: int = Field(default=16_384, ge=0)
+    checkpoint_ref_channels: list[str] = Field(
+        default=["execution_result", "previous_execution_result"]
+    )
+    # DB 커넥션 풀 (에이전트 노드와 배치 요청이 공유)
+    db_pool_size: int = Field(default=10, ge=1)
+    db_max_overflow: int = Field(default=10, ge=0)
+    # 배치 요청(/agent/batch) 최대 질문 수와 기본 동시 실행 수
+    batch_max_questions: int = Field(default=500, ge=1)
+    batch_max_concurrency: int = Field(default=8, ge=1)
+    # 백그라운드 작업(/agent/jobs) 워커 수와 대기 큐 최대 길이
+    job_workers: int = Field(default=4, ge=1)
+    job_queue_max_depth: int = Field(default=100, ge=1)
+    # 실행 중인 작업의 heartbeat 주기와, heartbeat가 이만큼 끊긴 작업을
+    # (프로세스가 죽은 것으로 보고) interrupted로 정리하는 기준
+    job_heartbeat_interval_s: float = Field(default=10.0, gt=0.0)
+    job_stale_after_s: float = Field(default=60.0, gt=0.0)
+    # 다른 프로세스가 실행하는 작업의 이벤트를 저장소에서 확인하는 주기
+    job_event_poll_interval_ms: int = Field(default=500, ge=10)
+    # 요약하지 않고 그대로 유지할 최근 메시지 수
+    memory_max_messages: int = Field(default=6, ge=2)
+    # 프롬프트에 포함할 이전 실행 결과의 최대 길이
+    memory_context_max_chars: int = Field(default=2000, ge=0)
+    # 모델 등급별 후보 모델 목록 (같은 등급 안에서 장애 시 서로 대체)
+    model_tiers: dict[str, list[str]] = Field(
+        default={
+            "small": ["openai:gpt-4o-mini"],
+            "large": ["openai:gpt-4o"],
+        }
+    )
+    # 노드 작업별로 사용할 모델 등급
+    node_model_tiers: dict[str, str] = Field(
+        default={
+            "intent": "small",
+            "chit_chat": "small",
+            "summary": "small",
+            "sql": "large",
+            "synthesis": "large",
+            "answer": "large",
+        }
+    )
+    # reflection에서 검증에 실패한 SQL을 다시 생성할 때 쓸 등급과
+    # 한 턴에서 SQL을 생성하는 최대 횟수
+    model_escalation_tier: str = Field(default="large")
+    sql_max_attempts: int = Field(default=2, ge=1)
+    # 모델별 지연 시간/오류율 EWMA 가중치와, 오류율이 이 값을 넘은 모델을
+    # 후순위로 미룰 시간
+    model_ewma_alpha: float = Field(default=0.2, gt=0.0, le=1.0)
+    model_max_error_rate: float = Field(default=0.5, ge=0.0, le=1.0)
+    model_unhealthy_cooldown_s: float = Field(default=30.0, ge=0.0)
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """설정을 처음 사용할 때 한 번만 읽어 옵니다."""
+    return Settings()
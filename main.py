@@ -1,32 +1,47 @@
 import sys
 
-import uvicorn
 from dotenv import load_dotenv
 from fastapi import FastAPI
 
-# 전역 예외 핸들러 설정
-# 이 코드는 다른 모듈보다 먼저 실행되어야 합니다.
-from src.core.custom_logging import handle_uncaught_exception
 
-sys.excepthook = handle_uncaught_exception
+def create_app() -> FastAPI:
+    """FastAPI 앱을 생성합니다.
 
-from src.api.endpoints import router
-from src.database.connection import lifespan
+    에이전트 그래프 컴파일, DB 엔진 생성 등 무거운 초기화는 lifespan에서
+    수행되므로 이 모듈의 import는 가볍게 유지됩니다.
+    """
+    load_dotenv()
 
-load_dotenv()
+    # 전역 예외 핸들러 설정
+    # 로깅 설정 직후, 다른 모듈보다 먼저 실행되어야 합니다.
+    from src.core.custom_logging import (
+        configure_logging,
+        handle_uncaught_exception,
+    )
 
-app = FastAPI(
-    title="Text-to-SQL Multi-Agent (SQLAlchemy)",
-    description="Pydantic AI와 LangGraph v1.0.0을 SQLAlchemy 기반으로 "
-    "리팩토링한 Text-to-SQL 에이전트",
-    lifespan=lifespan,
-)
+    configure_logging()
+    sys.excepthook = handle_uncaught_exception
 
-app.include_router(router)
+    from src.api.endpoints import router
+    from src.core.lifespan import lifespan
+
+    app = FastAPI(
+        title="Text-to-SQL Multi-Agent (SQLAlchemy)",
+        description="Pydantic AI와 LangGraph v1.0.0을 SQLAlchemy 기반으로 "
+        "리팩토링한 Text-to-SQL 에이전트",
+        lifespan=lifespan,
+    )
+    app.include_router(router)
+    return app
+
+
+app = create_app()
 
 
 if __name__ == "__main__":
     # 이 블록은 uvicorn으로 직접 실행될 때 사용됩니다.
     # 예: python main.py
     # 프로덕션 환경에서는 gunicorn/uvicorn 워커로 실행되므로, 이 블록은 실행되지 않습니다.
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)  # noqa: S104
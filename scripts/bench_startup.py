@@ -0,0 +1,194 @@
+"""Measures the cold start time of the FastAPI application.
+
+Two numbers are reported, each the median over fresh interpreters:
+
+- import: ``python -X importtime -c "import main"``, with the slowest
+  top-level imports.
+- ready: from interpreter start until the lifespan startup has completed
+  (``TestClient(app).__enter__()``), i.e. until the worker can serve
+  requests. This needs the database the app connects to.
+
+    python scripts/bench_startup.py                      # print a report
+    python scripts/bench_startup.py --output benchmarks/startup.json
+    python scripts/bench_startup.py --baseline benchmarks/startup.json
+    python scripts/bench_startup.py --import-only        # without a DB
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 새 인터프리터에서 앱을 import 하고 lifespan 시작이 끝날 때까지의 시간을
+# 잽니다. importtime 측정과 같이 인터프리터 자체의 시작 시간은 제외합니다.
+READY_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient({module}.app)
+entered = time.perf_counter()
+client.__enter__()
+ready = time.perf_counter()
+client.__exit__(None, None, None)
+print(json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (ready - entered) * 1000,
+}}))
+"""
+
+
+def _env() -> dict[str, str]:
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    return env
+
+
+def run_importtime(module: str) -> tuple[int, dict[str, int]]:
+    """Imports the module in a fresh interpreter.
+
+    Returns the total import time of the module and the cumulative time of
+    the imports it triggers directly or one level below, in microseconds.
+    """
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    total = 0
+    nested: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # 이름 앞 들여쓰기(2칸 단위)가 import 깊이를 나타냅니다.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 0 and name.strip() == module:
+            total = int(cumulative)
+        elif depth in (1, 2):
+            nested[name.strip()] = int(cumulative)
+    return total, nested
+
+
+def run_ready(module: str) -> tuple[float, float]:
+    """Starts the app in a fresh interpreter.
+
+    Returns the import time of the module and the time the lifespan startup
+    of ``module.app`` takes afterwards, in milliseconds.
+    """
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", READY_SCRIPT.format(module=module)],
+        cwd=ROOT,
+        env=_env(),
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            "lifespan startup failed (is the database running?):\n"
+            + result.stderr[-2000:]
+        )
+    timings = json.loads(result.stdout.splitlines()[-1])
+    return timings["import_ms"], timings["lifespan_ms"]
+
+
+def measure(module: str, runs: int, ready: bool = True) -> dict:
+    samples = [run_importtime(module) for _ in range(runs)]
+    modules = {
+        name: statistics.median(nested.get(name, 0) for _, nested in samples)
+        for name in samples[-1][1]
+    }
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)
+    report = {
+        "module": module,
+        "runs": runs,
+        "python": sys.version.split()[0],
+        # import main 까지 (워커 프로세스 생성 시간)
+        "total_ms": round(
+            statistics.median(total for total, _ in samples) / 1000, 1
+        ),
+    }
+    if ready:
+        ready_samples = [run_ready(module) for _ in range(runs)]
+        # lifespan 시작 완료까지 (워커가 요청을 받을 수 있는 시점)
+        report["lifespan_ms"] = round(
+            statistics.median(lifespan for _, lifespan in ready_samples), 1
+        )
+        report["ready_ms"] = round(
+            statistics.median(sum(sample) for sample in ready_samples), 1
+        )
+    report["slowest_imports_ms"] = {
+        name: round(us / 1000, 1) for name, us in slowest[:15]
+    }
+    return report
+
+
+# 기준값과 비교할 지표
+COMPARED_METRICS = ("total_ms", "ready_ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument(
+        "--baseline", type=Path, help="compare against a saved result"
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.2,
+        help="allowed slowdown vs. baseline (ratio, default 0.2 = 20%%)",
+    )
+    parser.add_argument(
+        "--import-only",
+        action="store_true",
+        help="skip the lifespan startup measurement (no database needed)",
+    )
+    args = parser.parse_args()
+
+    report = measure(args.module, args.runs, ready=not args.import_only)
+    print(f"import {report['module']}: {report['total_ms']} ms (median)")
+    if "ready_ms" in report:
+        print(
+            f"ready (import + lifespan startup): {report['ready_ms']} ms "
+            f"(lifespan {report['lifespan_ms']} ms, median)"
+        )
+    for name, ms in report["slowest_imports_ms"].items():
+        print(f"  {ms:>8.1f} ms  {name}")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressed = False
+        for metric in COMPARED_METRICS:
+            if metric not in report or metric not in baseline:
+                continue
+            limit = baseline[metric] * (1 + args.max_regression)
+            print(
+                f"baseline {metric}: {baseline[metric]} ms "
+                f"(limit {limit:.1f} ms)"
+            )
+            regressed |= report[metric] > limit
+        if regressed:
+            print("startup time regression")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
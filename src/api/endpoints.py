@@ -1,16 +1,29 @@
 import asyncio
 import json
+import uuid
+from typing import TYPE_CHECKING
 
 import structlog
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.ext.asyncio import AsyncSession
 
+from configs.settings import get_settings
+from src.core.custom_logging import bind_request_log_context
 from src.database.connection import get_db_session
-from src.database.utils import get_db_schema
-from src.schemas.agent_schemas import GraphState
-from src.schemas.api_schemas import QueryRequest
-from src.services.text_to_sql_agent import agent_app
+from src.schemas.api_schemas import (
+    BatchRequest,
+    JobStatusResponse,
+    JobSubmitResponse,
+    QueryRequest,
+)
+
+# 에이전트 관련 모듈(langgraph, pydantic-ai, SQLAlchemy)은 무거우므로
+# 타입 힌트용으로만 가져오고, 실제 import는 요청 처리 시점에 합니다.
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from src.services.job_manager import JobManager
 
 # 로거 설정
 logger = structlog.get_logger(__name__)
@@ -18,79 +31,225 @@ logger = structlog.get_logger(__name__)
 router = APIRouter()
 
 
+def get_agent_app(request: Request) -> "CompiledStateGraph":
+    """lifespan에서 컴파일된 에이전트 그래프를 제공합니다."""
+    return request.app.state.agent_app
+
+
+def get_batch_agent_app(request: Request) -> "CompiledStateGraph":
+    """checkpointer 없이 컴파일된 배치 실행용 그래프를 제공합니다."""
+    return request.app.state.batch_agent_app
+
+
+def get_job_manager(request: Request) -> "JobManager":
+    """lifespan에서 시작된 백그라운드 작업 관리자를 제공합니다."""
+    return request.app.state.job_manager
+
+
+def _sse(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
 @router.post("/agent/invoke")
 async def invoke_agent(
-    request: QueryRequest, db_session: AsyncSession = Depends(get_db_session)
+    request: QueryRequest,
+    db_session: "AsyncSession" = Depends(get_db_session),
+    agent_app: "CompiledStateGraph" = Depends(get_agent_app),
 ):
     """Text-to-SQL 에이전트를 스트리밍 방식으로 실행합니다."""
+    from src.services.agent_runner import (
+        iter_agent_events,
+        prepare_turn_input,
+        thread_config,
+    )
+
     if not request.question:
         logger.warning("사용자가 질문 없이 요청을 보냈습니다.")
         raise HTTPException(status_code=400, detail="Question cannot be empty")
 
+    thread_id = request.thread_id or uuid.uuid4().hex
+    bind_request_log_context(request_id=uuid.uuid4().hex, thread_id=thread_id)
     logger.info("에이전트 스트리밍 호출 시작", question=request.question)
+    config = thread_config(thread_id)
 
     async def stream_generator():
         try:
-            schema = await get_db_schema(db_session)
-            initial_state: GraphState = {
-                "question": request.question,
-                "db_schema": schema,
-                "reflection_history": [],
-                "intent": None,
-                "sql_query": None,
-                "reflection": [],
-                "execution_result": None,
-                "thought": None,
-                "answer": None,
-                "messages": [],
-                "thought_history": [],
-                "is_final": False,
-            }
-
-            async for event in agent_app.astream_events(
-                initial_state, version="v1"
-            ):
-                kind = event["event"]
-                if kind == "on_chain_end":
-                    node_name = event["name"]
-                    data = event["data"]["output"]
-
-                    if node_name == "sql_generator":
-                        if sql_query := data.get("sql_query"):
-                            # Stream the generated SQL query
-                            yield f"data: {json.dumps({'type': 'sql_query', 'data': sql_query})}\n\n"
-                            await asyncio.sleep(0.01)
-
-                    elif node_name == "sql_executor":
-                        if execution_result := data.get("execution_result"):
-                            # Stream the execution result
-                            yield f"data: {json.dumps({'type': 'execution_result', 'data': execution_result})}\n\n"
-                            await asyncio.sleep(0.01)
-
-                    elif node_name == "synthesize_result":
-                        if thought := data.get("thought"):
-                            # Stream the thought
-                            yield f"data: {json.dumps({'type': 'thought', 'data': thought})}\n\n"
-                            await asyncio.sleep(0.01)
-
-                    elif node_name == "final_answer":
-                        if answer := data.get("answer"):
-                            # Stream the final answer
-                            yield f"data: {json.dumps({'type': 'answer', 'data': answer})}\n\n"
-                            await asyncio.sleep(0.01)
+            yield _sse({"type": "thread", "data": thread_id})
+            turn_input = await prepare_turn_input(
+                agent_app, db_session, request.question, config
+            )
+            async for event in iter_agent_events(agent_app, turn_input, config):
+                yield _sse(event)
+                await asyncio.sleep(0.01)
 
         except Exception as e:
             logger.error(
                 "에이전트 스트리밍 중 오류 발생", error=str(e), exc_info=True
             )
-            error_message = json.dumps(
-                {"type": "error", "data": f"An error occurred: {e}"}
+            yield _sse({"type": "error", "data": f"An error occurred: {e}"})
+
+    return StreamingResponse(stream_generator(), media_type="text/event-stream")
+
+
+@router.post("/agent/batch")
+async def invoke_batch(
+    request: BatchRequest,
+    db_session: "AsyncSession" = Depends(get_db_session),
+    agent_app: "CompiledStateGraph" = Depends(get_batch_agent_app),
+):
+    """여러 질문을 실행하고 끝나는 순서대로 NDJSON으로 스트리밍합니다."""
+    from src.services.agent_runner import run_batch
+
+    if not request.questions or not all(q.strip() for q in request.questions):
+        logger.warning("빈 질문이 포함된 배치 요청")
+        raise HTTPException(status_code=400, detail="Questions cannot be empty")
+    settings = get_settings()
+    if len(request.questions) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.batch_max_questions} questions "
+            "per batch",
+        )
+
+    max_concurrency = min(
+        request.max_concurrency or settings.batch_max_concurrency,
+        settings.batch_max_concurrency,
+    )
+    bind_request_log_context(request_id=uuid.uuid4().hex)
+
+    async def stream_generator():
+        try:
+            async for result in run_batch(
+                agent_app,
+                db_session,
+                request.questions,
+                max_concurrency=max_concurrency,
+            ):
+                yield json.dumps(result, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error("배치 실행 중 오류 발생", error=str(e), exc_info=True)
+            error = {"status": "failed", "error": f"An error occurred: {e}"}
+            yield json.dumps(error, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(
+        stream_generator(), media_type="application/x-ndjson"
+    )
+
+
+@router.post("/agent/runs/{thread_id}/resume")
+async def resume_agent(
+    thread_id: str,
+    agent_app: "CompiledStateGraph" = Depends(get_agent_app),
+):
+    """중단된 실행을 마지막으로 완료된 노드의 checkpoint부터 이어갑니다."""
+    from src.services.agent_runner import iter_agent_events, thread_config
+
+    config = thread_config(thread_id)
+    snapshot = await agent_app.aget_state(config)
+    if not snapshot.next:
+        logger.warning("재개할 실행이 없습니다.", thread_id=thread_id)
+        raise HTTPException(
+            status_code=409, detail="No interrupted run to resume"
+        )
+
+    bind_request_log_context(request_id=uuid.uuid4().hex, thread_id=thread_id)
+    logger.info("에이전트 실행 재개", next_nodes=list(snapshot.next))
+
+    async def stream_generator():
+        try:
+            async for event in iter_agent_events(agent_app, None, config):
+                yield _sse(event)
+                await asyncio.sleep(0.01)
+        except Exception as e:
+            logger.error(
+                "에이전트 재개 중 오류 발생", error=str(e), exc_info=True
             )
-            yield f"data: {error_message}\n\n"
+            yield _sse({"type": "error", "data": f"An error occurred: {e}"})
+
+    return StreamingResponse(stream_generator(), media_type="text/event-stream")
+
+
+@router.post("/agent/jobs", status_code=202)
+async def submit_job(
+    request: QueryRequest,
+    job_manager: "JobManager" = Depends(get_job_manager),
+) -> JobSubmitResponse:
+    """질문을 백그라운드 작업으로 제출하고 즉시 작업 ID를 반환합니다."""
+    from src.services.job_manager import JobQueueFullError
+
+    if not request.question:
+        logger.warning("사용자가 질문 없이 작업을 제출했습니다.")
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    try:
+        job = await job_manager.submit(request.question, request.thread_id)
+    except JobQueueFullError:
+        logger.warning("작업 큐가 가득 차 제출을 거부했습니다.")
+        raise HTTPException(
+            status_code=429,
+            detail="Job queue is full, retry later",
+            headers={"Retry-After": "5"},
+        ) from None
+
+    logger.info("작업 제출", job_id=job.job_id, question=request.question)
+    return JobSubmitResponse(
+        job_id=job.job_id, thread_id=job.thread_id, status="queued"
+    )
+
+
+@router.get("/agent/jobs/metrics")
+def job_metrics(job_manager: "JobManager" = Depends(get_job_manager)):
+    """작업 큐 길이, 처리 건수, 대기/실행 시간 통계를 반환합니다."""
+    return job_manager.metrics_snapshot()
+
+
+@router.get("/agent/jobs/{job_id}")
+async def get_job(
+    job_id: str, job_manager: "JobManager" = Depends(get_job_manager)
+) -> JobStatusResponse:
+    """작업 상태와 (완료된 경우) 최종 답변을 반환합니다."""
+    job = await job_manager.repository.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse(**job)
+
+
+@router.get("/agent/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    after: int = 0,
+    last_event_id: int | None = Header(default=None),
+    job_manager: "JobManager" = Depends(get_job_manager),
+):
+    """작업 이벤트를 SSE로 재생하고, 실행 중이면 끝날 때까지 이어서 보냅니다.
+
+    after 또는 Last-Event-ID 헤더로 이미 받은 이벤트를 건너뛸 수 있습니다.
+    """
+    if await job_manager.repository.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    after_seq = max(after, last_event_id or 0)
+
+    async def stream_generator():
+        async for seq, event in job_manager.follow_events(job_id, after_seq):
+            yield f"id: {seq}\n{_sse(event)}"
 
     return StreamingResponse(stream_generator(), media_type="text/event-stream")
 
 
+@router.get("/agent/metrics/checkpoint")
+def checkpoint_metrics(request: Request):
+    """체크포인트 쓰기 횟수와 소요 시간 통계를 반환합니다."""
+    return request.app.state.checkpointer.stats_snapshot()
+
+
+@router.get("/agent/metrics/models")
+def model_metrics():
+    """모델별 호출 수, 지연 시간/오류율 EWMA와 장애 여부를 반환합니다."""
+    from src.services.model_router import get_model_router
+
+    return get_model_router().stats_snapshot()
+
+
 @router.get("/")
 def read_root():
     return {
@@ -1,83 +1,218 @@
+import atexit
+import hashlib
+import json
 import logging
 import logging.handlers
+import queue
+import random
 import sys
+from functools import cache
 
 import structlog
 from structlog.processors import CallsiteParameter, JSONRenderer
 
-from configs.settings import settings
-
-# structlog 공통 설정
-structlog.configure(
-    processors=[
-        structlog.stdlib.add_log_level,
-        structlog.contextvars.merge_contextvars,
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.UnicodeDecoder(),
-        structlog.processors.TimeStamper(fmt="%Y-%m-%d %H:%M:%S", utc=False),
-        structlog.processors.CallsiteParameterAdder(
-            parameters=[
-                CallsiteParameter.FILENAME,
-                CallsiteParameter.LINENO,
-                CallsiteParameter.FUNC_NAME,
-            ],
-        ),
-        # 이 프로세서는 항상 마지막에 두는 것이 좋습니다.
-        structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
-    ],
-    logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
-    cache_logger_on_first_use=True,
+from configs.settings import get_settings
+
+# 크기가 요청/결과에 비례하는 페이로드 필드
+PAYLOAD_FIELDS = frozenset(
+    {
+        "question",
+        "thought",
+        "sql_query",
+        "final_answer",
+        "answer",
+        "execution_result",
+        "reflections",
+        "prompt",
+    }
 )
 
 
-# 콘솔 핸들러 설정
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(
-    structlog.stdlib.ProcessorFormatter(
-        # 렌더링만 담당하도록 단순화
-        processors=[
-            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
-            structlog.dev.ConsoleRenderer(colors=True),
-        ],
-        foreign_pre_chain=[
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.processors.TimeStamper(
-                fmt="%Y-%m-%d %H:%M:%S", utc=False
-            ),
-        ],
+# 샘플링된 요청의 전체 페이로드를 기록하는 로거 (핸들러는 configure_logging)
+audit_logger = logging.getLogger("audit")
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """레코드를 포매팅하지 않고 그대로 큐에 넣는 핸들러.
+
+    직렬화는 QueueListener 스레드에서 수행되므로 요청 경로에는
+    큐에 넣는 비용만 남습니다.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class _AuditFormatter(logging.Formatter):
+    """감사 로그 레코드(dict)를 JSON 한 줄로 직렬화합니다."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
+
+
+def _payload_to_text(value) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list | tuple):
+        return "\n".join(str(item) for item in value)
+    return str(value)
+
+
+def summarize_payload(value, mode: str, max_chars: int):
+    """페이로드 값을 로그 정책에 맞게 축약합니다."""
+    if mode == "full" or value is None:
+        return value
+
+    text = _payload_to_text(value)
+    if mode == "truncated" and len(text) <= max_chars:
+        return value
+
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+    if mode == "off":
+        return {"len": len(text), "sha256": digest}
+    return (
+        f"{text[:max_chars]}...(+{len(text) - max_chars} chars, "
+        f"sha256={digest})"
     )
-)
 
-# 파일 핸들러 설정
-file_handler = logging.handlers.RotatingFileHandler(
-    settings.log_path, maxBytes=10_000_000, backupCount=5, encoding="utf-8"
-)
-file_handler.setFormatter(
-    structlog.stdlib.ProcessorFormatter(
-        # JSON 렌더링만 담당
+
+def emit_audit_payload(logger, method_name, event_dict):  # noqa: ARG001
+    """샘플링된 요청의 원본 이벤트를 감사 로그로 보냅니다.
+
+    요청 단위 샘플링 여부는 bind_request_log_context 에서 결정되며,
+    페이로드 필드가 있는 이벤트만 기록합니다.
+    """
+    sampled = event_dict.pop("audit_sampled", False)
+    if sampled and not PAYLOAD_FIELDS.isdisjoint(event_dict):
+        audit_logger.info(dict(event_dict))
+    return event_dict
+
+
+def limit_payload_fields(logger, method_name, event_dict):  # noqa: ARG001
+    """페이로드 필드를 설정된 수준으로 잘라내거나 해시로 대체합니다."""
+    settings = get_settings()
+    mode = settings.log_payload_mode
+    if mode == "full":
+        return event_dict
+    for key in PAYLOAD_FIELDS.intersection(event_dict):
+        event_dict[key] = summarize_payload(
+            event_dict[key], mode, settings.log_payload_max_chars
+        )
+    return event_dict
+
+
+def bind_request_log_context(**values) -> None:
+    """요청 단위 로그 컨텍스트를 바인딩하고 감사 로그 샘플링을 결정합니다."""
+    sample_rate = get_settings().audit_log_sample_rate
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(
+        audit_sampled=random.random() < sample_rate,  # noqa: S311
+        **values,
+    )
+
+
+@cache
+def configure_logging() -> None:
+    """structlog와 콘솔/파일/감사 로그 핸들러를 설정합니다 (한 번만 실행)."""
+    settings = get_settings()
+
+    # structlog 공통 설정
+    structlog.configure(
         processors=[
-            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
-            structlog.processors.dict_tracebacks,
-            JSONRenderer(ensure_ascii=False),
-        ],
-        foreign_pre_chain=[
-            structlog.stdlib.add_logger_name,
             structlog.stdlib.add_log_level,
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.StackInfoRenderer(),
+            structlog.processors.UnicodeDecoder(),
             structlog.processors.TimeStamper(
                 fmt="%Y-%m-%d %H:%M:%S", utc=False
             ),
+            structlog.processors.CallsiteParameterAdder(
+                parameters=[
+                    CallsiteParameter.FILENAME,
+                    CallsiteParameter.LINENO,
+                    CallsiteParameter.FUNC_NAME,
+                ],
+            ),
+            # 렌더링(콘솔 + JSON 파일) 전에 페이로드 크기를 제한합니다.
+            emit_audit_payload,
+            limit_payload_fields,
+            # 이 프로세서는 항상 마지막에 두는 것이 좋습니다.
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
         ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
     )
-)
 
-# 루트 로거에 핸들러 추가
-root_logger = logging.getLogger()
-root_logger.handlers.clear()
-root_logger.addHandler(console_handler)
-root_logger.addHandler(file_handler)
-root_logger.setLevel(logging.INFO)
+    # 콘솔 핸들러 설정
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            # 렌더링만 담당하도록 단순화
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.dev.ConsoleRenderer(colors=True),
+            ],
+            foreign_pre_chain=[
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.processors.TimeStamper(
+                    fmt="%Y-%m-%d %H:%M:%S", utc=False
+                ),
+            ],
+        )
+    )
+
+    # 파일 핸들러 설정 (로그 디렉터리는 저장소에 포함하지 않으므로 생성)
+    settings.log_path.parent.mkdir(parents=True, exist_ok=True)
+    file_handler = logging.handlers.RotatingFileHandler(
+        settings.log_path, maxBytes=10_000_000, backupCount=5, encoding="utf-8"
+    )
+    file_handler.setFormatter(
+        structlog.stdlib.ProcessorFormatter(
+            # JSON 렌더링만 담당
+            processors=[
+                structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+                structlog.processors.dict_tracebacks,
+                JSONRenderer(ensure_ascii=False),
+            ],
+            foreign_pre_chain=[
+                structlog.stdlib.add_logger_name,
+                structlog.stdlib.add_log_level,
+                structlog.processors.TimeStamper(
+                    fmt="%Y-%m-%d %H:%M:%S", utc=False
+                ),
+            ],
+        )
+    )
+
+    # 감사 로그 핸들러 설정 (별도 스레드에서 파일에 기록)
+    settings.audit_log_path.parent.mkdir(parents=True, exist_ok=True)
+    audit_file_handler = logging.handlers.RotatingFileHandler(
+        settings.audit_log_path,
+        maxBytes=50_000_000,
+        backupCount=5,
+        encoding="utf-8",
+    )
+    audit_file_handler.setFormatter(_AuditFormatter())
+    audit_queue: queue.SimpleQueue = queue.SimpleQueue()
+    audit_listener = logging.handlers.QueueListener(
+        audit_queue, audit_file_handler
+    )
+    audit_listener.start()
+    atexit.register(audit_listener.stop)
+
+    audit_logger.handlers.clear()
+    audit_logger.addHandler(_DeferredQueueHandler(audit_queue))
+    audit_logger.setLevel(logging.INFO)
+    audit_logger.propagate = False
+
+    # 루트 로거에 핸들러 추가
+    root_logger = logging.getLogger()
+    root_logger.handlers.clear()
+    root_logger.addHandler(console_handler)
+    root_logger.addHandler(file_handler)
+    root_logger.setLevel(logging.INFO)
 
 
 def handle_uncaught_exception(exc_type, exc_value, exc_traceback):
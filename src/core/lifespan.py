@@ -0,0 +1,45 @@
+from contextlib import asynccontextmanager
+
+import structlog
+from fastapi import FastAPI
+
+from configs.settings import get_settings
+
+# 로거 설정
+logger = structlog.get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """FastAPI 앱의 라이프사이클 동안 DB 엔진과 에이전트 그래프를 관리합니다.
+
+    langgraph, pydantic-ai, SQLAlchemy 등 무거운 모듈은 여기서 처음
+    import 하므로 앱 모듈 import(워커 생성, 테스트 수집)는 가볍게 유지됩니다.
+    """
+    from src.database.connection import get_engine
+    from src.repositories.job_repository import JobRepository
+    from src.services.checkpointer import open_checkpointer
+    from src.services.job_manager import JobManager
+    from src.services.text_to_sql_agent import build_agent_app
+
+    settings = get_settings()
+    logger.info("🚀 애플리케이션 시작")
+    async with open_checkpointer() as checkpointer:
+        app.state.checkpointer = checkpointer
+        app.state.agent_app = build_agent_app(checkpointer)
+        # 배치 질문은 이어서 대화하지 않으므로 스레드 상태를 남기지 않습니다.
+        app.state.batch_agent_app = build_agent_app(None)
+        app.state.job_manager = JobManager(
+            app.state.agent_app,
+            JobRepository(get_engine()),
+            workers=settings.job_workers,
+            max_queue_depth=settings.job_queue_max_depth,
+            heartbeat_interval=settings.job_heartbeat_interval_s,
+            stale_after=settings.job_stale_after_s,
+            poll_interval=settings.job_event_poll_interval_ms / 1000,
+        )
+        await app.state.job_manager.start()
+        yield
+        await app.state.job_manager.stop()
+    logger.info("🏁 애플리케이션 종료, DB 엔진 연결 해제")
+    await get_engine().dispose()
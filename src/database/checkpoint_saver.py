@@ -0,0 +1,642 @@
+import asyncio
+import contextlib
+import hashlib
+import time
+from collections.abc import AsyncIterator, Sequence
+from typing import Any
+
+import structlog
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# 로거 설정
+logger = structlog.get_logger(__name__)
+
+# 큰 채널 값 대신 checkpoint에 저장되는 참조 표식
+BLOB_REF_KEY = "__blob_ref__"
+
+# 내부 테이블은 public 밖에 두어 LLM에 전달되는 스키마와 sql_guard가
+# 허용하는 테이블 목록(get_db_schema)에 포함되지 않게 합니다.
+SETUP_STATEMENTS = (
+    "CREATE SCHEMA IF NOT EXISTS agent_internal",
+    """
+    CREATE TABLE IF NOT EXISTS agent_internal.graph_checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        checkpoint_type TEXT NOT NULL,
+        checkpoint BYTEA NOT NULL,
+        metadata_type TEXT NOT NULL,
+        metadata BYTEA NOT NULL,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agent_internal.graph_checkpoint_writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL DEFAULT '',
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        task_path TEXT NOT NULL DEFAULT '',
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        value_type TEXT NOT NULL,
+        value BYTEA NOT NULL,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agent_internal.graph_checkpoint_blobs (
+        blob_key TEXT PRIMARY KEY,
+        value_type TEXT NOT NULL,
+        value BYTEA NOT NULL
+    )
+    """,
+    # 스레드별 blob 참조: 스레드를 지울 때 더 이상 참조되지 않는 blob을
+    # 찾는 데 사용합니다.
+    """
+    CREATE TABLE IF NOT EXISTS agent_internal.graph_checkpoint_blob_refs (
+        thread_id TEXT NOT NULL,
+        blob_key TEXT NOT NULL
+            REFERENCES agent_internal.graph_checkpoint_blobs (blob_key),
+        PRIMARY KEY (thread_id, blob_key)
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS graph_checkpoint_blob_refs_blob_key
+    ON agent_internal.graph_checkpoint_blob_refs (blob_key)
+    """,
+)
+
+INSERT_BLOB = text("""
+    INSERT INTO agent_internal.graph_checkpoint_blobs (
+        blob_key, value_type, value
+    )
+    VALUES (:blob_key, :value_type, :value)
+    ON CONFLICT (blob_key) DO NOTHING
+""")
+
+INSERT_BLOB_REF = text("""
+    INSERT INTO agent_internal.graph_checkpoint_blob_refs (thread_id, blob_key)
+    VALUES (:thread_id, :blob_key)
+    ON CONFLICT (thread_id, blob_key) DO NOTHING
+""")
+
+INSERT_CHECKPOINT = text("""
+    INSERT INTO agent_internal.graph_checkpoints (
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+        checkpoint_type, checkpoint, metadata_type, metadata
+    )
+    VALUES (
+        :thread_id, :checkpoint_ns, :checkpoint_id, :parent_checkpoint_id,
+        :checkpoint_type, :checkpoint, :metadata_type, :metadata
+    )
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id) DO UPDATE SET
+        checkpoint_type = EXCLUDED.checkpoint_type,
+        checkpoint = EXCLUDED.checkpoint,
+        metadata_type = EXCLUDED.metadata_type,
+        metadata = EXCLUDED.metadata
+""")
+
+UPSERT_WRITE = text("""
+    INSERT INTO agent_internal.graph_checkpoint_writes (
+        thread_id, checkpoint_ns, checkpoint_id, task_id, task_path,
+        idx, channel, value_type, value
+    )
+    VALUES (
+        :thread_id, :checkpoint_ns, :checkpoint_id, :task_id, :task_path,
+        :idx, :channel, :value_type, :value
+    )
+    ON CONFLICT (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    DO UPDATE SET
+        channel = EXCLUDED.channel,
+        value_type = EXCLUDED.value_type,
+        value = EXCLUDED.value
+""")
+
+SELECT_WRITES = text("""
+    SELECT task_id, channel, value_type, value
+    FROM agent_internal.graph_checkpoint_writes
+    WHERE thread_id = :thread_id
+      AND checkpoint_ns = :checkpoint_ns
+      AND checkpoint_id = :checkpoint_id
+    ORDER BY task_id, idx
+""")
+
+SELECT_BLOBS = text("""
+    SELECT blob_key, value_type, value
+    FROM agent_internal.graph_checkpoint_blobs
+    WHERE blob_key IN :blob_keys
+""").bindparams(bindparam("blob_keys", expanding=True))
+
+DELETE_THREAD_BLOB_REFS = text("""
+    DELETE FROM agent_internal.graph_checkpoint_blob_refs
+    WHERE thread_id = :thread_id
+    RETURNING blob_key
+""")
+
+# 다른 스레드가 아직 참조하는 blob은 남깁니다.
+DELETE_UNREFERENCED_BLOBS = text("""
+    DELETE FROM agent_internal.graph_checkpoint_blobs AS b
+    WHERE b.blob_key IN :blob_keys
+      AND NOT EXISTS (
+        SELECT 1 FROM agent_internal.graph_checkpoint_blob_refs AS r
+        WHERE r.blob_key = b.blob_key
+      )
+""").bindparams(bindparam("blob_keys", expanding=True))
+
+
+# 마지막 checkpoint가 ttl_s 보다 오래된 스레드
+SELECT_EXPIRED_THREADS = text("""
+    SELECT thread_id
+    FROM agent_internal.graph_checkpoints
+    GROUP BY thread_id
+    HAVING max(created_at) < now() - make_interval(secs => :ttl_s)
+    LIMIT :limit
+""")
+
+
+class PostgresCheckpointSaver(BaseCheckpointSaver):
+    """
+    기존 SQLAlchemy 비동기 엔진을 사용하는 LangGraph checkpointer.
+
+    - 쓰기는 메모리 버퍼에 쌓였다가 백그라운드 태스크가 한 트랜잭션으로
+      일괄 기록하므로 노드마다 DB 왕복이 추가되지 않습니다.
+    - 읽기 전에는 버퍼를 먼저 비워 자신이 쓴 내용을 항상 읽습니다.
+    - ref_channels 에 속한 큰 채널 값은 내용 해시로 별도 테이블에 한 번만
+      저장하고, checkpoint 에는 참조만 남깁니다. 스레드를 삭제하면 다른
+      스레드가 참조하지 않는 blob도 함께 지웁니다.
+    - 버퍼가 max_pending_rows 에 이르면 쓰기 호출이 직접 플러시하므로, DB
+      장애 중에는 버퍼가 커지는 대신 쓰기가 실패합니다.
+    - thread_ttl 을 지정하면 expiry_interval 마다 마지막 checkpoint가
+      thread_ttl 보다 오래된 스레드를 삭제합니다.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        *,
+        flush_interval: float = 0.05,
+        max_batch_size: int = 100,
+        inline_max_bytes: int = 16_384,
+        ref_channels: Sequence[str] = (),
+        max_pending_rows: int = 10_000,
+        thread_ttl: float | None = None,
+        expiry_interval: float = 300.0,
+    ):
+        super().__init__()
+        self.engine = engine
+        self.flush_interval = flush_interval
+        self.max_batch_size = max_batch_size
+        self.inline_max_bytes = inline_max_bytes
+        self.ref_channels = frozenset(ref_channels)
+        self.max_pending_rows = max_pending_rows
+        self.thread_ttl = thread_ttl
+        self.expiry_interval = expiry_interval
+
+        self._blobs: dict[str, dict[str, Any]] = {}
+        self._blob_refs: set[tuple[str, str]] = set()
+        # 플러시 중인 배치의 행 수 (실패하면 버퍼로 돌아옵니다)
+        self._inflight_rows = 0
+        self._checkpoints: list[dict[str, Any]] = []
+        self._writes: list[dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._flusher: asyncio.Task | None = None
+        self._expirer: asyncio.Task | None = None
+
+        self._flush_count = 0
+        self._flushed_rows = 0
+        self._flush_ms_total = 0.0
+        self._flush_ms_max = 0.0
+
+    # --- 수명 주기 ---
+
+    async def setup(self) -> None:
+        """checkpoint 테이블이 없으면 생성합니다."""
+        async with self.engine.begin() as conn:
+            for statement in SETUP_STATEMENTS:
+                await conn.execute(text(statement))
+
+    def start(self) -> None:
+        """백그라운드 플러시 (와 스레드 만료) 태스크를 시작합니다."""
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if self.thread_ttl and self._expirer is None:
+            self._expirer = asyncio.create_task(self._expiry_loop())
+
+    async def aclose(self) -> None:
+        """백그라운드 태스크를 멈추고 남은 버퍼를 기록합니다."""
+        for task in (self._flusher, self._expirer):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        self._flusher = None
+        self._expirer = None
+        await self.flush()
+
+    # --- 버퍼링 ---
+
+    def _pending_rows(self) -> int:
+        return (
+            len(self._blobs)
+            + len(self._blob_refs)
+            + len(self._checkpoints)
+            + len(self._writes)
+        )
+
+    async def _reserve(self) -> None:
+        """버퍼가 가득 찼으면 쓰기 전에 직접 플러시합니다 (실패 시 예외)."""
+        if self._pending_rows() + self._inflight_rows >= self.max_pending_rows:
+            await self.flush()
+
+    def _enqueued(self) -> None:
+        if self._pending_rows() >= self.max_batch_size:
+            self._wakeup.set()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.flush_interval
+                )
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # 실패한 배치는 flush가 버퍼에 되돌려 두었습니다.
+                logger.error(
+                    "Checkpoint flush failed", error=str(e), exc_info=True
+                )
+
+    async def flush(self) -> None:
+        """버퍼에 쌓인 checkpoint 쓰기를 한 트랜잭션으로 기록합니다."""
+        async with self._flush_lock:
+            if not self._pending_rows():
+                return
+            blobs, self._blobs = self._blobs, {}
+            blob_refs, self._blob_refs = self._blob_refs, set()
+            checkpoints, self._checkpoints = self._checkpoints, []
+            writes, self._writes = self._writes, []
+
+            rows = len(blobs) + len(blob_refs) + len(checkpoints) + len(writes)
+            self._inflight_rows = rows
+            started = time.perf_counter()
+            try:
+                async with self.engine.begin() as conn:
+                    if blobs:
+                        await conn.execute(INSERT_BLOB, list(blobs.values()))
+                    if blob_refs:
+                        await conn.execute(
+                            INSERT_BLOB_REF,
+                            [
+                                {"thread_id": thread_id, "blob_key": key}
+                                for thread_id, key in blob_refs
+                            ],
+                        )
+                    if checkpoints:
+                        await conn.execute(INSERT_CHECKPOINT, checkpoints)
+                    if writes:
+                        await conn.execute(UPSERT_WRITE, writes)
+            except Exception:
+                # 다음 주기에 재시도합니다. 버퍼 크기는 _reserve가 제한합니다.
+                self._blobs = {**blobs, **self._blobs}
+                self._blob_refs |= blob_refs
+                self._checkpoints = checkpoints + self._checkpoints
+                self._writes = writes + self._writes
+                raise
+            finally:
+                self._inflight_rows = 0
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._flush_count += 1
+            self._flushed_rows += rows
+            self._flush_ms_total += elapsed_ms
+            self._flush_ms_max = max(self._flush_ms_max, elapsed_ms)
+            logger.debug(
+                "Checkpoint batch flushed",
+                rows=rows,
+                elapsed_ms=round(elapsed_ms, 3),
+            )
+
+    def flush_stats(self) -> dict[str, float]:
+        return {
+            "count": self._flush_count,
+            "rows": self._flushed_rows,
+            "avg_ms": round(self._flush_ms_total / self._flush_count, 3)
+            if self._flush_count
+            else 0.0,
+            "max_ms": round(self._flush_ms_max, 3),
+            "pending_rows": self._pending_rows(),
+        }
+
+    # --- 직렬화 ---
+
+    def _dump_channel_value(
+        self, thread_id: str, channel: str, value: Any
+    ) -> Any:
+        """큰 채널 값을 blob으로 분리하고 참조로 대체합니다."""
+        if channel not in self.ref_channels or value is None:
+            return value
+        value_type, data = self.serde.dumps_typed(value)
+        if len(data) <= self.inline_max_bytes:
+            return value
+        blob_key = hashlib.sha256(data).hexdigest()
+        self._blobs.setdefault(
+            blob_key,
+            {"blob_key": blob_key, "value_type": value_type, "value": data},
+        )
+        self._blob_refs.add((thread_id, blob_key))
+        return {BLOB_REF_KEY: blob_key}
+
+    @staticmethod
+    def _blob_key(value: Any) -> str | None:
+        if isinstance(value, dict) and BLOB_REF_KEY in value:
+            return value[BLOB_REF_KEY]
+        return None
+
+    async def _load_blobs(self, conn, blob_keys: set[str]) -> dict[str, Any]:
+        if not blob_keys:
+            return {}
+        result = await conn.execute(
+            SELECT_BLOBS, {"blob_keys": list(blob_keys)}
+        )
+        return {
+            row.blob_key: self.serde.loads_typed((row.value_type, row.value))
+            for row in result
+        }
+
+    async def _build_tuple(self, conn, row) -> CheckpointTuple:
+        checkpoint = self.serde.loads_typed(
+            (row.checkpoint_type, row.checkpoint)
+        )
+        metadata = self.serde.loads_typed((row.metadata_type, row.metadata))
+        writes_result = await conn.execute(
+            SELECT_WRITES,
+            {
+                "thread_id": row.thread_id,
+                "checkpoint_ns": row.checkpoint_ns,
+                "checkpoint_id": row.checkpoint_id,
+            },
+        )
+        pending_writes = [
+            (
+                w.task_id,
+                w.channel,
+                self.serde.loads_typed((w.value_type, w.value)),
+            )
+            for w in writes_result
+        ]
+
+        channel_values = checkpoint.get("channel_values", {})
+        blob_keys = {
+            key
+            for value in [
+                *channel_values.values(),
+                *(value for _, _, value in pending_writes),
+            ]
+            if (key := self._blob_key(value))
+        }
+        blobs = await self._load_blobs(conn, blob_keys)
+        for channel, value in channel_values.items():
+            if key := self._blob_key(value):
+                channel_values[channel] = blobs.get(key)
+        pending_writes = [
+            (task_id, channel, blobs.get(key))
+            if (key := self._blob_key(value))
+            else (task_id, channel, value)
+            for task_id, channel, value in pending_writes
+        ]
+
+        parent_config = None
+        if row.parent_checkpoint_id:
+            parent_config = {
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": row.parent_checkpoint_id,
+                }
+            }
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": row.checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=metadata,
+            parent_config=parent_config,
+            pending_writes=pending_writes,
+        )
+
+    # --- BaseCheckpointSaver 구현 ---
+
+    async def aget_tuple(
+        self, config: RunnableConfig
+    ) -> CheckpointTuple | None:
+        await self.flush()
+        configurable = config["configurable"]
+        params = {
+            "thread_id": configurable["thread_id"],
+            "checkpoint_ns": configurable.get("checkpoint_ns", ""),
+        }
+        query = """
+            SELECT * FROM agent_internal.graph_checkpoints
+            WHERE thread_id = :thread_id AND checkpoint_ns = :checkpoint_ns
+        """
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = :checkpoint_id"
+            params["checkpoint_id"] = checkpoint_id
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(text(query), params)).first()
+            if row is None:
+                return None
+            return await self._build_tuple(conn, row)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        await self.flush()
+        clauses = []
+        params: dict[str, Any] = {}
+        if config is not None:
+            configurable = config["configurable"]
+            clauses.append("thread_id = :thread_id")
+            params["thread_id"] = configurable["thread_id"]
+            if (checkpoint_ns := configurable.get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = :checkpoint_ns")
+                params["checkpoint_ns"] = checkpoint_ns
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = :checkpoint_id")
+                params["checkpoint_id"] = checkpoint_id
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < :before_id")
+            params["before_id"] = before_id
+
+        query = "SELECT * FROM agent_internal.graph_checkpoints"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        # metadata는 직렬화되어 저장되므로 filter는 읽은 뒤 적용합니다.
+        yielded = 0
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(text(query), params)).fetchall()
+            for row in rows:
+                if limit is not None and yielded >= limit:
+                    return
+                item = await self._build_tuple(conn, row)
+                if filter and any(
+                    item.metadata.get(k) != v for k, v in filter.items()
+                ):
+                    continue
+                yielded += 1
+                yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,  # noqa: ARG002
+    ) -> RunnableConfig:
+        await self._reserve()
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+
+        stored = {
+            **checkpoint,
+            "channel_values": {
+                channel: self._dump_channel_value(thread_id, channel, value)
+                for channel, value in checkpoint["channel_values"].items()
+            },
+        }
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(stored)
+        metadata_type, metadata_data = self.serde.dumps_typed(metadata)
+        self._checkpoints.append(
+            {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+                "parent_checkpoint_id": configurable.get("checkpoint_id"),
+                "checkpoint_type": checkpoint_type,
+                "checkpoint": checkpoint_data,
+                "metadata_type": metadata_type,
+                "metadata": metadata_data,
+            }
+        )
+        self._enqueued()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await self._reserve()
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        for idx, (channel, value) in enumerate(writes):
+            value_type, data = self.serde.dumps_typed(
+                self._dump_channel_value(thread_id, channel, value)
+            )
+            self._writes.append(
+                {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": configurable.get("checkpoint_ns", ""),
+                    "checkpoint_id": configurable["checkpoint_id"],
+                    "task_id": task_id,
+                    "task_path": task_path,
+                    "idx": WRITES_IDX_MAP.get(channel, idx),
+                    "channel": channel,
+                    "value_type": value_type,
+                    "value": data,
+                }
+            )
+        self._enqueued()
+
+    async def adelete_expired_threads(
+        self, ttl_s: float, limit: int = 1000
+    ) -> int:
+        """마지막 checkpoint가 ttl_s 초보다 오래된 스레드를 삭제합니다."""
+        await self.flush()
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                SELECT_EXPIRED_THREADS, {"ttl_s": ttl_s, "limit": limit}
+            )
+            thread_ids = list(result.scalars())
+        for thread_id in thread_ids:
+            await self.adelete_thread(thread_id)
+        return len(thread_ids)
+
+    async def _expiry_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.expiry_interval)
+            try:
+                deleted = await self.adelete_expired_threads(self.thread_ttl)
+            except Exception as e:
+                logger.error("Checkpoint expiry failed", error=str(e))
+                continue
+            if deleted:
+                logger.info("Expired checkpoint threads deleted", count=deleted)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.flush()
+        async with self.engine.begin() as conn:
+            for table in ("graph_checkpoint_writes", "graph_checkpoints"):
+                await conn.execute(
+                    text(
+                        f"DELETE FROM agent_internal.{table} "  # noqa: S608
+                        "WHERE thread_id = :thread_id"
+                    ),
+                    {"thread_id": thread_id},
+                )
+            result = await conn.execute(
+                DELETE_THREAD_BLOB_REFS, {"thread_id": thread_id}
+            )
+            blob_keys = list(result.scalars())
+
+        if not blob_keys:
+            return
+        try:
+            async with self.engine.begin() as conn:
+                await conn.execute(
+                    DELETE_UNREFERENCED_BLOBS, {"blob_keys": blob_keys}
+                )
+        except DBAPIError as e:
+            # 다른 스레드가 같은 blob을 동시에 참조하기 시작한 경우입니다.
+            # 외래 키가 참조 중인 blob 삭제를 막으므로 건너뛰어도 안전합니다.
+            logger.warning("Checkpoint blob cleanup skipped", error=str(e))
@@ -47,3 +47,16 @@ async def get_db_schema(session: AsyncSession) -> str:
                 exc_info=True,
             )
             raise
+
+
+def parse_db_schema(schema_str: str) -> dict[str, set[str]]:
+    """get_db_schema의 스키마 문자열을 테이블별 컬럼 집합으로 변환합니다."""
+    schema: dict[str, set[str]] = {}
+    columns: set[str] = set()
+    for line in schema_str.splitlines():
+        if line.startswith("Table ") and line.endswith(":"):
+            table = line[len("Table ") : -1].lower()
+            columns = schema.setdefault(table, set())
+        elif line.strip().startswith("- "):
+            columns.add(line.strip()[2:].split(" ", 1)[0].lower())
+    return schema
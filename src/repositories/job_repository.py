@@ -0,0 +1,223 @@
+import json
+
+import structlog
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# 로거 설정
+logger = structlog.get_logger(__name__)
+
+# 작업이 끝난 상태. 이 상태의 작업은 마지막 이벤트로 'done'을 가집니다.
+TERMINAL_STATUSES = ("succeeded", "failed", "interrupted")
+
+# 내부 테이블은 public 밖에 두어 LLM에 전달되는 스키마와 sql_guard가
+# 허용하는 테이블 목록(get_db_schema)에 포함되지 않게 합니다.
+SETUP_STATEMENTS = (
+    "CREATE SCHEMA IF NOT EXISTS agent_internal",
+    """
+    CREATE TABLE IF NOT EXISTS agent_internal.agent_jobs (
+        job_id TEXT PRIMARY KEY,
+        thread_id TEXT NOT NULL,
+        question TEXT NOT NULL,
+        status TEXT NOT NULL,
+        answer TEXT,
+        error TEXT,
+        event_count INTEGER NOT NULL DEFAULT 0,
+        -- 작업을 실행하는 프로세스와 그 프로세스가 마지막으로 살아 있음을
+        -- 알린 시각
+        owner TEXT NOT NULL,
+        heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        started_at TIMESTAMPTZ,
+        finished_at TIMESTAMPTZ
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS agent_internal.agent_job_events (
+        job_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        event_type TEXT NOT NULL,
+        data TEXT,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        PRIMARY KEY (job_id, seq)
+    )
+    """,
+)
+
+# 끝나지 못한 작업을 interrupted로 바꾸고, 구독자가 기다리지 않도록 error와
+# done 이벤트를 같은 문장에서 덧붙입니다.
+INTERRUPT_JOBS = """
+    WITH interrupted AS (
+        UPDATE agent_internal.agent_jobs
+        SET status = 'interrupted',
+            error = 'Job was interrupted before it finished',
+            finished_at = now(),
+            event_count = event_count + 2
+        WHERE status IN ('queued', 'running') AND {condition}
+        RETURNING job_id, event_count
+    )
+    INSERT INTO agent_internal.agent_job_events (
+        job_id, seq, event_type, data
+    )
+    SELECT job_id, event_count - 1, 'error',
+           '"Job was interrupted before it finished"'
+    FROM interrupted
+    UNION ALL
+    SELECT job_id, event_count, 'done', '"interrupted"' FROM interrupted
+    ON CONFLICT (job_id, seq) DO NOTHING
+    RETURNING job_id
+"""
+
+
+class JobRepository:
+    """백그라운드 에이전트 작업과 이벤트를 PostgreSQL에 저장합니다."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+
+    async def setup(self) -> None:
+        """작업 테이블이 없으면 생성합니다."""
+        async with self.engine.begin() as conn:
+            for statement in SETUP_STATEMENTS:
+                await conn.execute(text(statement))
+
+    async def _interrupt(self, condition: str, params: dict) -> int:
+        async with self.engine.begin() as conn:
+            result = await conn.execute(
+                text(INTERRUPT_JOBS.format(condition=condition)), params
+            )
+            return len({row.job_id for row in result})
+
+    async def mark_owner_unfinished_as_interrupted(self, owner: str) -> int:
+        """이 프로세스가 끝내지 못한 작업을 interrupted로 표시합니다."""
+        return await self._interrupt("owner = :owner", {"owner": owner})
+
+    async def mark_stale_as_interrupted(self, stale_after_s: float) -> int:
+        """heartbeat가 끊긴(프로세스가 죽은) 작업을 interrupted로 표시합니다."""
+        return await self._interrupt(
+            "heartbeat_at < now() - make_interval(secs => :stale_after_s)",
+            {"stale_after_s": stale_after_s},
+        )
+
+    async def heartbeat(self, job_ids: list[str]) -> None:
+        """실행 중인 작업의 소유 프로세스가 살아 있음을 기록합니다."""
+        if not job_ids:
+            return
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text("""
+                UPDATE agent_internal.agent_jobs SET heartbeat_at = now()
+                WHERE job_id IN :job_ids
+            """).bindparams(bindparam("job_ids", expanding=True)),
+                {"job_ids": job_ids},
+            )
+
+    async def create(
+        self, job_id: str, thread_id: str, question: str, owner: str
+    ) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text("""
+                INSERT INTO agent_internal.agent_jobs (
+                    job_id, thread_id, question, status, owner
+                )
+                VALUES (:job_id, :thread_id, :question, 'queued', :owner)
+            """),
+                {
+                    "job_id": job_id,
+                    "thread_id": thread_id,
+                    "question": question,
+                    "owner": owner,
+                },
+            )
+
+    async def mark_running(self, job_id: str) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text("""
+                UPDATE agent_internal.agent_jobs
+                SET status = 'running', started_at = now()
+                WHERE job_id = :job_id
+            """),
+                {"job_id": job_id},
+            )
+
+    async def mark_finished(
+        self,
+        job_id: str,
+        status: str,
+        answer: str | None = None,
+        error: str | None = None,
+    ) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text("""
+                UPDATE agent_internal.agent_jobs
+                SET status = :status, answer = :answer, error = :error,
+                    finished_at = now()
+                WHERE job_id = :job_id AND status IN ('queued', 'running')
+            """),
+                {
+                    "job_id": job_id,
+                    "status": status,
+                    "answer": answer,
+                    "error": error,
+                },
+            )
+
+    async def append_event(self, job_id: str, seq: int, event: dict) -> None:
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text("""
+                INSERT INTO agent_internal.agent_job_events (
+                    job_id, seq, event_type, data
+                )
+                VALUES (:job_id, :seq, :event_type, :data)
+            """),
+                {
+                    "job_id": job_id,
+                    "seq": seq,
+                    "event_type": event["type"],
+                    "data": json.dumps(event["data"], ensure_ascii=False),
+                },
+            )
+            await conn.execute(
+                text("""
+                UPDATE agent_internal.agent_jobs SET event_count = :seq
+                WHERE job_id = :job_id
+            """),
+                {"job_id": job_id, "seq": seq},
+            )
+
+    async def get(self, job_id: str) -> dict | None:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                text(
+                    "SELECT * FROM agent_internal.agent_jobs "
+                    "WHERE job_id = :job_id"
+                ),
+                {"job_id": job_id},
+            )
+            row = result.mappings().first()
+            return dict(row) if row else None
+
+    async def list_events(
+        self, job_id: str, after_seq: int = 0
+    ) -> list[tuple[int, dict]]:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(
+                text("""
+                SELECT seq, event_type, data
+                FROM agent_internal.agent_job_events
+                WHERE job_id = :job_id AND seq > :after_seq
+                ORDER BY seq
+            """),
+                {"job_id": job_id, "after_seq": after_seq},
+            )
+            return [
+                (
+                    row.seq,
+                    {"type": row.event_type, "data": json.loads(row.data)},
+                )
+                for row in result
+            ]
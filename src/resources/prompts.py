@@ -5,7 +5,7 @@ class Prompts:
     """A container for all application prompts, structured as static methods."""
 
     @staticmethod
-    def classify_intent(question: str) -> str:
+    def classify_intent(question: str, conversation: str = "None") -> str:
         """Generates the prompt for the intent classification node."""
         return f"""
     Classify the user's intent based on their question into one of
@@ -14,14 +14,22 @@ class Prompts:
 
     - For work-related questions involving data lookup or analysis,
         classify as "sql_generation".
+    - Follow-up questions that refer to earlier results in the conversation
+        (e.g. "among them, who is the highest?") are "sql_generation".
     - If the intent is unclear, you must classify it as "unknown".
 
+    ### Conversation so far:
+    {conversation}
+
     User Question: {question}
     """
 
     @staticmethod
     def generate_sql(
-        db_schema: str, reflection_feedback: str, question: str
+        db_schema: str,
+        reflection_feedback: str,
+        question: str,
+        conversation: str = "None",
     ) -> str:
         """Generates the prompt for the SQL generation node."""
         return f"""
@@ -34,6 +42,9 @@ class Prompts:
     ### Database Schema:
     {db_schema}
 
+    ### Conversation so far (use it to resolve follow-up questions):
+    {conversation}
+
     ### Feedback from previous attempts (if any):
     {reflection_feedback}
 
@@ -63,11 +74,49 @@ class Prompts:
         """
 
     @staticmethod
-    def generate_chit_chat(question: str) -> str:
+    def synthesize_profiled_result(question: str, result_summary: str) -> str:
+        """Generates the synthesis prompt for a locally summarized result."""
+        return f"""
+        Based on the user's question and a summary of the database query
+        result, synthesize a thought process in **Korean**.
+        The result was too large to show in full. Statistics and group
+        summaries were computed over **all rows**; the sample rows are only
+        illustrative. Prefer the statistics when answering.
+        This thought process will be shown to the user.
+
+        **You must answer based only on the provided result summary.**
+
+        - User Question: {question}
+        - Query Result Summary:
+        {result_summary}
+
+        Your thought process must be in clear, natural **Korean**.
+        """
+
+    @staticmethod
+    def generate_chit_chat(question: str, conversation: str = "None") -> str:
         """Generates the prompt for a chit-chat response."""
-        return f"""The user said: '{question}'.
+        return f"""Conversation so far: {conversation}
+        The user said: '{question}'.
         Respond with a brief, friendly, and conversational message."""
 
+    @staticmethod
+    def summarize_history(previous_summary: str, transcript: str) -> str:
+        """Generates the prompt for compacting older conversation turns."""
+        return f"""
+        Update the running summary of a conversation between a user and a
+        Text-to-SQL assistant.
+        Keep the facts needed to answer follow-up questions: which tables,
+        filters and entities were discussed and what the results were.
+        Keep it short (at most 10 sentences) and write it in **Korean**.
+
+        - Current Summary: {previous_summary}
+        - New Turns:
+        {transcript}
+
+        **Updated Summary (in Korean):**
+        """
+
     @staticmethod
     def generate_final_answer(thought: str, question: str) -> str:
         """Generates the prompt for the final answer node."""
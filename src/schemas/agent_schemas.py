@@ -14,7 +14,8 @@ class ThoughtAndSQL(BaseModel):
     thought: str = Field(description="SQL 쿼리 생성을 위한 논리적 사고 과정")
     query: str = Field(
         description="사용자의 질문에 답하기 위한 PostgreSQL SELECT 쿼리문",
-        pattern=r"^SELECT.*",
+        # WITH ... SELECT 형태의 CTE도 허용합니다. 세부 검증은 sql_guard 에서.
+        pattern=r"(?i)^\s*(SELECT|WITH)\b",
     )
 
 
@@ -44,10 +45,19 @@ class GraphState(TypedDict):
     intent: str | None
     sql_query: str | None
     reflection: list[str]
+    # 이번 턴에서 SQL을 생성한 횟수 (reflection 실패 시 재시도 제한)
+    sql_attempts: int
     reflection_history: list[str]
     execution_result: str | None
+    # 큰 실행 결과를 로컬에서 요약한 내용과 그로 인해 절약한 토큰 수
+    result_summary: str | None
+    result_token_savings: int | None
     thought: str | None
     answer: str | None
     messages: Annotated[Sequence[BaseMessage], add_messages]
     thought_history: list[str]
     is_final: bool
+    # 이전 턴에서 이어받는 대화 메모리
+    history_summary: str | None
+    previous_sql_query: str | None
+    previous_execution_result: str | None
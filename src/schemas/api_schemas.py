@@ -1,10 +1,38 @@
-from pydantic import BaseModel
+from datetime import datetime
+
+from pydantic import BaseModel, Field
 
 
 class QueryRequest(BaseModel):
     question: str
+    # 같은 thread_id로 보낸 질문은 이전 대화 맥락을 이어받습니다.
+    thread_id: str | None = None
+
+
+class BatchRequest(BaseModel):
+    questions: list[str]
+    max_concurrency: int | None = Field(default=None, ge=1)
 
 
 class QueryResponse(BaseModel):
     answer: str
     thoughts: list[str]
+
+
+class JobSubmitResponse(BaseModel):
+    job_id: str
+    thread_id: str
+    status: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    thread_id: str
+    question: str
+    status: str
+    answer: str | None = None
+    error: str | None = None
+    event_count: int
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
@@ -0,0 +1,134 @@
+from collections.abc import AsyncIterator, Sequence
+
+import structlog
+from langgraph.graph.state import CompiledStateGraph
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.utils import get_db_schema
+
+# 로거 설정
+logger = structlog.get_logger(__name__)
+
+# 사용자에게 전달할 노드 출력: 노드 이름 -> (상태 키, 이벤트 타입)
+STREAMED_NODE_OUTPUTS = {
+    "sql_generator": ("sql_query", "sql_query"),
+    "sql_executor": ("execution_result", "execution_result"),
+    "synthesize_result": ("thought", "thought"),
+    "final_answer": ("answer", "answer"),
+}
+
+
+def thread_config(thread_id: str) -> dict:
+    """대화 스레드에 해당하는 LangGraph 실행 설정을 만듭니다."""
+    return {"configurable": {"thread_id": thread_id}}
+
+
+async def prepare_turn_input(
+    agent_app: CompiledStateGraph,
+    db_session: AsyncSession,
+    question: str,
+    config: dict,
+) -> dict:
+    """한 턴의 그래프 입력을 만듭니다.
+
+    대화 메모리(messages, 이전 SQL/결과)는 checkpointer에서 이어받고,
+    턴 단위 필드만 초기화합니다. 같은 스레드의 이전 턴에서 조회한
+    스키마는 재사용합니다.
+    """
+    snapshot = await agent_app.aget_state(config)
+    schema = snapshot.values.get("db_schema") or await get_db_schema(db_session)
+    return build_turn_input(question, schema)
+
+
+def build_turn_input(question: str, db_schema: str) -> dict:
+    """질문과 스키마로 턴 단위 필드를 초기화한 그래프 입력을 만듭니다."""
+    return {
+        "question": question,
+        "db_schema": db_schema,
+        "reflection_history": [],
+        "intent": None,
+        "reflection": [],
+        "sql_attempts": 0,
+        "thought": None,
+        "answer": None,
+        "thought_history": [],
+        "is_final": False,
+    }
+
+
+async def iter_agent_events(
+    agent_app: CompiledStateGraph, graph_input: dict | None, config: dict
+) -> AsyncIterator[dict]:
+    """그래프 실행 중 사용자에게 보여줄 노드 출력을 이벤트로 변환합니다.
+
+    graph_input이 None이면 마지막으로 완료된 노드의 checkpoint부터
+    실행을 이어갑니다.
+    """
+    async for event in agent_app.astream_events(
+        graph_input, config=config, version="v1"
+    ):
+        if event["event"] != "on_chain_end":
+            continue
+        node_output = STREAMED_NODE_OUTPUTS.get(event["name"])
+        if node_output is None:
+            continue
+        key, event_type = node_output
+        if value := event["data"]["output"].get(key):
+            yield {"type": event_type, "data": value}
+
+
+def normalize_question(question: str) -> str:
+    """중복 판별을 위해 공백과 대소문자를 정규화합니다."""
+    return " ".join(question.split()).casefold()
+
+
+async def run_batch(
+    agent_app: CompiledStateGraph,
+    db_session: AsyncSession,
+    questions: Sequence[str],
+    *,
+    max_concurrency: int,
+) -> AsyncIterator[dict]:
+    """여러 질문을 한 번에 실행하고 끝나는 순서대로 결과를 돌려줍니다.
+
+    스키마는 한 번만 조회하고, 정규화 후 같은 질문은 한 번만 실행해
+    원래 위치마다 같은 결과를 돌려줍니다. 동시 실행 수는
+    max_concurrency로 제한됩니다. 배치 질문은 이어서 대화할 스레드가
+    없으므로 checkpointer 없이 컴파일한 그래프로 실행해야 합니다.
+    """
+    schema = await get_db_schema(db_session)
+
+    positions: dict[str, list[int]] = {}
+    for index, question in enumerate(questions):
+        positions.setdefault(normalize_question(question), []).append(index)
+    unique = [
+        (key, questions[indexes[0]]) for key, indexes in positions.items()
+    ]
+    logger.info(
+        "배치 실행 시작",
+        total=len(questions),
+        unique=len(unique),
+        max_concurrency=max_concurrency,
+    )
+
+    inputs = [build_turn_input(question, schema) for _, question in unique]
+    config = {"max_concurrency": max_concurrency}
+    async for i, output in agent_app.abatch_as_completed(
+        inputs, config, return_exceptions=True
+    ):
+        key, _ = unique[i]
+        if isinstance(output, Exception):
+            logger.error("배치 질문 실행 실패", error=str(output))
+            result = {"status": "failed", "error": str(output)}
+        else:
+            result = {
+                "status": "succeeded",
+                "answer": output.get("answer"),
+                "sql_query": output.get("sql_query"),
+            }
+        for index in positions[key]:
+            yield {
+                "index": index,
+                "question": questions[index],
+                **result,
+            }
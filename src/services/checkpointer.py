@@ -0,0 +1,271 @@
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from contextlib import asynccontextmanager
+from typing import Any
+
+import structlog
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from configs.settings import get_settings
+from src.database.checkpoint_saver import PostgresCheckpointSaver
+from src.database.connection import get_engine
+
+# 로거 설정
+logger = structlog.get_logger(__name__)
+
+
+class CheckpointWriteStats:
+    """체크포인트 쓰기 횟수와 소요 시간을 누적합니다."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+
+    def snapshot(self) -> dict[str, float]:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "avg_ms": round(self.total_ms / self.count, 3)
+            if self.count
+            else 0.0,
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class BoundedInMemorySaver(InMemorySaver):
+    """
+    스레드 수와 유휴 시간을 제한하는 InMemorySaver.
+
+    thread_id 없이 들어온 요청마다 새 스레드가 생기므로, 읽기/쓰기 때마다
+    max_threads 를 넘는 스레드와 thread_ttl 동안 사용하지 않은 스레드를
+    가장 오래 사용하지 않은 순서로 지웁니다.
+    """
+
+    def __init__(self, *, max_threads: int, thread_ttl: float | None = None):
+        super().__init__()
+        self.max_threads = max_threads
+        self.thread_ttl = thread_ttl
+        self.evicted_threads = 0
+        # thread_id -> 마지막 사용 시각 (오래된 순)
+        self._last_used: OrderedDict[str, float] = OrderedDict()
+
+    def _touch(self, config: RunnableConfig) -> None:
+        now = time.monotonic()
+        thread_id = config["configurable"]["thread_id"]
+        self._last_used[thread_id] = now
+        self._last_used.move_to_end(thread_id)
+
+        expired_before = now - self.thread_ttl if self.thread_ttl else None
+        while self._last_used:
+            oldest, last_used = next(iter(self._last_used.items()))
+            if len(self._last_used) <= self.max_threads and (
+                expired_before is None or last_used >= expired_before
+            ):
+                break
+            self.delete_thread(oldest)
+            self.evicted_threads += 1
+            logger.debug("Checkpoint thread evicted", thread_id=oldest)
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        result = super().get_tuple(config)
+        thread_id = config["configurable"]["thread_id"]
+        if result is not None:
+            self._touch(config)
+        elif thread_id not in self._last_used:
+            # 없는 스레드를 읽으면 defaultdict에 빈 항목이 생깁니다.
+            self.storage.pop(thread_id, None)
+        return result
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        result = super().put(config, checkpoint, metadata, new_versions)
+        self._touch(config)
+        return result
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self._last_used.pop(thread_id, None)
+
+
+class TimedCheckpointSaver(BaseCheckpointSaver):
+    """다른 checkpointer를 감싸 쓰기 비용을 측정합니다."""
+
+    def __init__(self, inner: BaseCheckpointSaver):
+        super().__init__(serde=inner.serde)
+        self.inner = inner
+        self.stats = {
+            "put": CheckpointWriteStats(),
+            "put_writes": CheckpointWriteStats(),
+        }
+
+    def _record(self, kind: str, started: float, config: RunnableConfig):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats[kind].record(elapsed_ms)
+        logger.debug(
+            "Checkpoint write",
+            kind=kind,
+            thread_id=config["configurable"].get("thread_id"),
+            elapsed_ms=round(elapsed_ms, 3),
+        )
+
+    def stats_snapshot(self) -> dict[str, dict[str, float]]:
+        snapshot = {
+            kind: stats.snapshot() for kind, stats in self.stats.items()
+        }
+        if isinstance(self.inner, PostgresCheckpointSaver):
+            snapshot["flush"] = self.inner.flush_stats()
+        if isinstance(self.inner, BoundedInMemorySaver):
+            snapshot["evicted_threads"] = {"count": self.inner.evicted_threads}
+        return snapshot
+
+    # --- 읽기: 그대로 위임 ---
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return self.inner.get_tuple(config)
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self.inner.list(
+            config, filter=filter, before=before, limit=limit
+        )
+
+    async def aget_tuple(
+        self, config: RunnableConfig
+    ) -> CheckpointTuple | None:
+        return await self.inner.aget_tuple(config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        async for item in self.inner.alist(
+            config, filter=filter, before=before, limit=limit
+        ):
+            yield item
+
+    # --- 쓰기: 소요 시간 측정 ---
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        started = time.perf_counter()
+        try:
+            return self.inner.put(config, checkpoint, metadata, new_versions)
+        finally:
+            self._record("put", started, config)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            self.inner.put_writes(config, writes, task_id, task_path)
+        finally:
+            self._record("put_writes", started, config)
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        started = time.perf_counter()
+        try:
+            return await self.inner.aput(
+                config, checkpoint, metadata, new_versions
+            )
+        finally:
+            self._record("put", started, config)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            await self.inner.aput_writes(config, writes, task_id, task_path)
+        finally:
+            self._record("put_writes", started, config)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.inner.delete_thread(thread_id)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await self.inner.adelete_thread(thread_id)
+
+    def get_next_version(self, current, channel):
+        return self.inner.get_next_version(current, channel)
+
+
+@asynccontextmanager
+async def open_checkpointer() -> AsyncIterator[TimedCheckpointSaver]:
+    """설정된 저장소의 checkpointer를 열고 종료 시 정리합니다."""
+    settings = get_settings()
+    if settings.checkpointer_backend == "postgres":
+        saver = PostgresCheckpointSaver(
+            get_engine(),
+            flush_interval=settings.checkpoint_flush_interval_ms / 1000,
+            max_batch_size=settings.checkpoint_max_batch_size,
+            inline_max_bytes=settings.checkpoint_inline_max_bytes,
+            ref_channels=settings.checkpoint_ref_channels,
+            max_pending_rows=settings.checkpoint_max_pending_rows,
+            thread_ttl=settings.checkpoint_thread_ttl_s or None,
+            expiry_interval=settings.checkpoint_expiry_interval_s,
+        )
+        await saver.setup()
+        saver.start()
+        logger.info("Checkpointer ready", backend="postgres")
+        try:
+            yield TimedCheckpointSaver(saver)
+        finally:
+            await saver.aclose()
+    else:
+        logger.info("Checkpointer ready", backend="memory")
+        yield TimedCheckpointSaver(
+            BoundedInMemorySaver(
+                max_threads=settings.checkpoint_memory_max_threads,
+                thread_ttl=settings.checkpoint_thread_ttl_s or None,
+            )
+        )
@@ -0,0 +1,345 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+
+import structlog
+from langgraph.graph.state import CompiledStateGraph
+
+from src.core.custom_logging import bind_request_log_context
+from src.database.connection import new_session
+from src.repositories.job_repository import TERMINAL_STATUSES, JobRepository
+from src.services.agent_runner import (
+    iter_agent_events,
+    prepare_turn_input,
+    thread_config,
+)
+
+# 로거 설정
+logger = structlog.get_logger(__name__)
+
+
+class JobQueueFullError(Exception):
+    """작업 큐가 가득 차 새 작업을 받을 수 없을 때 발생합니다."""
+
+
+@dataclass
+class Job:
+    """실행 중이거나 대기 중인 작업의 메모리 상태."""
+
+    job_id: str
+    thread_id: str
+    question: str
+    submitted_at: float = field(default_factory=time.perf_counter)
+    events: list[dict] = field(default_factory=list)
+    done: bool = False
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+
+
+class JobManager:
+    """
+    에이전트 질문을 백그라운드에서 처리하는 프로세스 내 워커 풀.
+
+    작업과 이벤트는 JobRepository에 저장되므로 클라이언트는 연결을
+    끊었다가 나중에 결과를 조회하거나 이벤트를 다시 받을 수 있습니다.
+    여러 워커 프로세스가 같은 테이블을 쓰므로 각 작업에는 실행하는
+    프로세스(owner)가 기록되고, 그 프로세스가 주기적으로 heartbeat를
+    남깁니다. heartbeat가 끊긴 작업은 어느 프로세스에서든 interrupted로
+    정리됩니다.
+    """
+
+    def __init__(
+        self,
+        agent_app: CompiledStateGraph,
+        repository: JobRepository,
+        *,
+        workers: int,
+        max_queue_depth: int,
+        heartbeat_interval: float = 10.0,
+        stale_after: float = 60.0,
+        poll_interval: float = 0.5,
+    ):
+        self.agent_app = agent_app
+        self.repository = repository
+        self.worker_count = workers
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = stale_after
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}"
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=max_queue_depth)
+        # 작업 행을 만드는 중이라 아직 큐에 들어가지 않은 제출 수
+        self._reserved = 0
+        self._live: dict[str, Job] = {}
+        self._workers: list[asyncio.Task] = []
+        self._heartbeat_task: asyncio.Task | None = None
+
+        self._metrics = {
+            "submitted": 0,
+            "rejected": 0,
+            "started": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "interrupted": 0,
+        }
+        self._queue_wait_ms_total = 0.0
+        self._run_ms_total = 0.0
+        self._run_ms_max = 0.0
+
+    # --- 수명 주기 ---
+
+    async def start(self) -> None:
+        """작업 테이블을 준비하고 워커를 시작합니다."""
+        await self.repository.setup()
+        await self._reap_stale_jobs()
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.worker_count)
+        ]
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        logger.info(
+            "Job workers started", workers=self.worker_count, owner=self.owner
+        )
+
+    async def stop(self) -> None:
+        """워커를 종료하고, 끝나지 않은 이 프로세스의 작업을 정리합니다."""
+        tasks = [*self._workers, self._heartbeat_task]
+        for task in tasks:
+            if task is not None:
+                task.cancel()
+        await asyncio.gather(
+            *(t for t in tasks if t is not None), return_exceptions=True
+        )
+        self._workers = []
+        self._heartbeat_task = None
+        try:
+            interrupted = (
+                await self.repository.mark_owner_unfinished_as_interrupted(
+                    self.owner
+                )
+            )
+        except Exception as e:
+            # 정리하지 못한 작업은 heartbeat가 끊긴 뒤 다른 프로세스가
+            # interrupted로 정리합니다.
+            logger.error("Could not interrupt unfinished jobs", error=str(e))
+            return
+        if interrupted:
+            logger.warning("종료 시 중단된 작업", count=interrupted)
+
+    async def _reap_stale_jobs(self) -> None:
+        interrupted = await self.repository.mark_stale_as_interrupted(
+            self.stale_after
+        )
+        if interrupted:
+            logger.warning("heartbeat가 끊겨 중단된 작업", count=interrupted)
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.repository.heartbeat(list(self._live))
+                await self._reap_stale_jobs()
+            except Exception as e:
+                logger.error("Job heartbeat failed", error=str(e))
+
+    # --- 제출 / 조회 ---
+
+    async def submit(self, question: str, thread_id: str | None) -> Job:
+        """새 작업을 큐에 넣습니다. 큐가 가득 차면 JobQueueFullError."""
+        # 작업 행을 만드는 await 동안 다른 제출이 같은 자리를 차지하지
+        # 않도록 큐 자리를 먼저 예약합니다.
+        if self._queue.qsize() + self._reserved >= self._queue.maxsize:
+            self._metrics["rejected"] += 1
+            raise JobQueueFullError
+        self._reserved += 1
+
+        job = Job(
+            job_id=uuid.uuid4().hex,
+            thread_id=thread_id or uuid.uuid4().hex,
+            question=question,
+        )
+        try:
+            await self.repository.create(
+                job.job_id, job.thread_id, question, self.owner
+            )
+        finally:
+            self._reserved -= 1
+        self._live[job.job_id] = job
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._live.pop(job.job_id, None)
+            self._metrics["rejected"] += 1
+            await self.repository.mark_finished(
+                job.job_id, "failed", error="Job queue is full"
+            )
+            raise JobQueueFullError from None
+        self._metrics["submitted"] += 1
+        return job
+
+    async def follow_events(
+        self, job_id: str, after_seq: int = 0
+    ) -> AsyncIterator[tuple[int, dict]]:
+        """after_seq 이후의 이벤트를 재생하고, 작업이 끝날 때까지 따라갑니다.
+
+        작업이 끝나면 마지막 이벤트는 항상 'done' 입니다.
+        """
+        job = self._live.get(job_id)
+        if job is None:
+            # 이미 끝났거나 다른 프로세스의 작업: 저장소를 폴링합니다.
+            async for item in self._poll_events(job_id, after_seq):
+                yield item
+            return
+
+        seq = after_seq
+        while True:
+            async with job.changed:
+                await job.changed.wait_for(
+                    lambda seq=seq: len(job.events) > seq or job.done
+                )
+                new_events = job.events[seq:]
+            for event in new_events:
+                seq += 1
+                yield seq, event
+            if job.done and seq >= len(job.events):
+                return
+
+    async def _poll_events(
+        self, job_id: str, after_seq: int
+    ) -> AsyncIterator[tuple[int, dict]]:
+        seq = after_seq
+        while True:
+            # 상태를 먼저 읽어야 끝난 뒤 저장된 이벤트를 놓치지 않습니다.
+            job = await self.repository.get(job_id)
+            events = await self.repository.list_events(job_id, seq)
+            for event_seq, event in events:
+                seq = event_seq
+                yield seq, event
+                if event["type"] == "done":
+                    return
+            if job is None:
+                return
+            if job["status"] in TERMINAL_STATUSES:
+                # 'done' 이벤트를 남기지 못하고 끝난 작업
+                yield seq, {"type": "done", "data": job["status"]}
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    def metrics_snapshot(self) -> dict:
+        started = self._metrics["started"]
+        finished = (
+            self._metrics["succeeded"]
+            + self._metrics["failed"]
+            + self._metrics["interrupted"]
+        )
+        return {
+            **self._metrics,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "in_flight": len(self._live),
+            "avg_queue_wait_ms": round(self._queue_wait_ms_total / started, 3)
+            if started
+            else 0.0,
+            "avg_run_ms": round(self._run_ms_total / finished, 3)
+            if finished
+            else 0.0,
+            "max_run_ms": round(self._run_ms_max, 3),
+        }
+
+    # --- 실행 ---
+
+    async def _publish(self, job: Job, event: dict) -> None:
+        # 저장 후에 알려야 늦게 붙은 구독자가 DB에서 빠짐없이 재생합니다.
+        await self.repository.append_event(
+            job.job_id, len(job.events) + 1, event
+        )
+        async with job.changed:
+            job.events.append(event)
+            job.changed.notify_all()
+
+    async def _publish_safely(self, job: Job, event: dict) -> None:
+        """저장에 실패해도 예외를 올리지 않는 _publish (오류/종료 이벤트용)."""
+        try:
+            await self._publish(job, event)
+        except Exception as e:
+            logger.error(
+                "Could not record job event",
+                event_type=event["type"],
+                error=str(e),
+            )
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except Exception as e:
+                logger.error(
+                    "Job bookkeeping failed",
+                    job_id=job.job_id,
+                    error=str(e),
+                    exc_info=True,
+                )
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        bind_request_log_context(request_id=job.job_id, thread_id=job.thread_id)
+        started = time.perf_counter()
+        self._metrics["started"] += 1
+        self._queue_wait_ms_total += (started - job.submitted_at) * 1000
+        logger.info("Job started", question=job.question)
+
+        # 워커가 취소되면 (서버 종료) interrupted로 남습니다.
+        status = "interrupted"
+        try:
+            answer, error = None, None
+            try:
+                await self.repository.mark_running(job.job_id)
+                await self._publish(
+                    job, {"type": "thread", "data": job.thread_id}
+                )
+                config = thread_config(job.thread_id)
+                async with new_session() as session:
+                    turn_input = await prepare_turn_input(
+                        self.agent_app, session, job.question, config
+                    )
+                async for event in iter_agent_events(
+                    self.agent_app, turn_input, config
+                ):
+                    if event["type"] == "answer":
+                        answer = event["data"]
+                    await self._publish(job, event)
+            except Exception as e:
+                logger.error("Job failed", error=str(e), exc_info=True)
+                error = str(e)
+                await self._publish_safely(
+                    job, {"type": "error", "data": f"An error occurred: {e}"}
+                )
+
+            status = "failed" if error else "succeeded"
+            try:
+                await self.repository.mark_finished(
+                    job.job_id, status, answer=answer, error=error
+                )
+            except Exception as e:
+                # 저장된 상태는 heartbeat가 끊긴 뒤 interrupted로 정리됩니다.
+                logger.error("Could not record job status", error=str(e))
+            await self._publish_safely(job, {"type": "done", "data": status})
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._metrics[status] += 1
+            self._run_ms_total += elapsed_ms
+            self._run_ms_max = max(self._run_ms_max, elapsed_ms)
+            async with job.changed:
+                # 저장하지 못했더라도 이 프로세스의 구독자는 끝을 알아야 합니다.
+                if not job.events or job.events[-1]["type"] != "done":
+                    job.events.append({"type": "done", "data": status})
+                job.done = True
+                job.changed.notify_all()
+            self._live.pop(job.job_id, None)
+            logger.info(
+                "Job finished", status=status, elapsed_ms=round(elapsed_ms, 3)
+            )
@@ -0,0 +1,211 @@
+import time
+from collections.abc import Mapping, Sequence
+from functools import cache
+from typing import Any
+
+import httpx
+import structlog
+from pydantic_ai import Agent
+from pydantic_ai.agent import AgentRunResult
+from pydantic_ai.exceptions import ModelHTTPError
+from pydantic_ai.models import Model
+
+from configs.settings import get_settings
+
+# 로거 설정
+logger = structlog.get_logger(__name__)
+
+# 모델은 "openai:gpt-4o" 같은 문자열 또는 pydantic-ai Model 인스턴스
+# (테스트에서는 TestModel/FunctionModel, 설정 문자열로는 "test")
+ModelSpec = str | Model
+
+# 다음 후보로 넘어가고 오류율에 반영하는 전송 계층 오류.
+# 출력 검증 실패(UnexpectedModelBehavior) 같은 나머지 예외는 모델 상태와
+# 무관하므로 바로 올립니다.
+TRANSPORT_ERRORS = (
+    ModelHTTPError,
+    httpx.HTTPError,
+    TimeoutError,
+    ConnectionError,
+)
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """예외 또는 그 원인(__cause__)이 전송 계층 오류인지 확인합니다.
+
+    공급자 SDK는 연결 오류를 자체 예외로 감싸 올리므로 원인까지 확인합니다.
+    """
+    current: BaseException | None = error
+    while current is not None:
+        if isinstance(current, TRANSPORT_ERRORS):
+            return True
+        current = current.__cause__
+    return False
+
+
+def model_name(model: ModelSpec) -> str:
+    """통계와 로그에 쓸 모델 이름."""
+    if isinstance(model, str):
+        return model
+    return f"{model.system}:{model.model_name}"
+
+
+class ModelStats:
+    """모델별 지연 시간과 오류율의 EWMA를 누적합니다."""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.calls = 0
+        self.failures = 0
+        self.latency_ms_ewma: float | None = None
+        self.error_rate_ewma = 0.0
+        self.last_failure_at: float | None = None
+
+    def record_success(self, elapsed_ms: float) -> None:
+        self.calls += 1
+        self.error_rate_ewma *= 1 - self.alpha
+        if self.latency_ms_ewma is None:
+            self.latency_ms_ewma = elapsed_ms
+        else:
+            self.latency_ms_ewma += self.alpha * (
+                elapsed_ms - self.latency_ms_ewma
+            )
+
+    def record_failure(self) -> None:
+        self.calls += 1
+        self.failures += 1
+        self.error_rate_ewma += self.alpha * (1 - self.error_rate_ewma)
+        self.last_failure_at = time.monotonic()
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "latency_ms_ewma": round(self.latency_ms_ewma, 3)
+            if self.latency_ms_ewma is not None
+            else None,
+            "error_rate_ewma": round(self.error_rate_ewma, 4),
+        }
+
+
+class ModelRouter:
+    """노드 작업을 모델 등급에 매핑하고, 등급 안의 후보 모델로 요청을 보냅니다.
+
+    후보 중 오류율이 높은 모델은 cooldown 동안 뒤로 미루고, 나머지는
+    지연 시간 EWMA가 낮은 순서로 시도합니다. 호출이 전송 오류(HTTP 오류,
+    연결 실패, 타임아웃)로 실패하면 다음 후보로 넘어가며, 모든 후보가
+    실패하면 마지막 예외를 그대로 올립니다. 그 밖의 예외는 바로 올립니다.
+    """
+
+    def __init__(
+        self,
+        tiers: Mapping[str, Sequence[ModelSpec]],
+        task_tiers: Mapping[str, str],
+        escalation_tier: str,
+        ewma_alpha: float = 0.2,
+        max_error_rate: float = 0.5,
+        unhealthy_cooldown_s: float = 30.0,
+    ):
+        for tier in [*task_tiers.values(), escalation_tier]:
+            if not tiers.get(tier):
+                raise ValueError(f"Model tier '{tier}' has no models")
+        self.tiers = {tier: list(models) for tier, models in tiers.items()}
+        self.task_tiers = dict(task_tiers)
+        self.escalation_tier = escalation_tier
+        self.ewma_alpha = ewma_alpha
+        self.max_error_rate = max_error_rate
+        self.unhealthy_cooldown_s = unhealthy_cooldown_s
+        self._stats: dict[str, ModelStats] = {}
+        self._agents: dict[tuple[str, type], Agent] = {}
+
+    def _stats_for(self, model: ModelSpec) -> ModelStats:
+        name = model_name(model)
+        if name not in self._stats:
+            self._stats[name] = ModelStats(self.ewma_alpha)
+        return self._stats[name]
+
+    def _agent(self, model: ModelSpec, output_type: type) -> Agent:
+        # Agent는 실행 간 상태가 없으므로 (모델, 출력 타입)마다 재사용합니다.
+        key = (model_name(model), output_type)
+        if key not in self._agents:
+            self._agents[key] = Agent(model, output_type=output_type)
+        return self._agents[key]
+
+    def is_healthy(self, model: ModelSpec) -> bool:
+        stats = self._stats_for(model)
+        if stats.error_rate_ewma <= self.max_error_rate:
+            return True
+        # cooldown이 지나면 다시 앞쪽 후보로 올려 회복 여부를 확인합니다.
+        elapsed = time.monotonic() - (stats.last_failure_at or 0.0)
+        return elapsed >= self.unhealthy_cooldown_s
+
+    def candidates(self, task: str, escalate: bool = False) -> list[ModelSpec]:
+        """작업에 사용할 모델 후보를 시도할 순서대로 반환합니다."""
+        tier = self.escalation_tier if escalate else self.task_tiers[task]
+
+        def sort_key(model: ModelSpec) -> tuple[bool, float]:
+            # 아직 호출 기록이 없는 모델은 0ms로 보고 먼저 시도합니다.
+            latency = self._stats_for(model).latency_ms_ewma or 0.0
+            return (not self.is_healthy(model), latency)
+
+        return sorted(self.tiers[tier], key=sort_key)
+
+    async def run(
+        self,
+        task: str,
+        prompt: str,
+        output_type: type = str,
+        escalate: bool = False,
+    ) -> AgentRunResult:
+        """후보 모델을 차례로 시도해 첫 번째 성공 결과를 반환합니다."""
+        last_error: Exception | None = None
+        for model in self.candidates(task, escalate=escalate):
+            stats = self._stats_for(model)
+            started = time.perf_counter()
+            try:
+                result = await self._agent(model, output_type).run(prompt)
+            except Exception as e:
+                if not is_transport_error(e):
+                    raise
+                stats.record_failure()
+                logger.warning(
+                    "Model call failed, trying next candidate",
+                    task=task,
+                    model=model_name(model),
+                    error=str(e),
+                )
+                last_error = e
+                continue
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            stats.record_success(elapsed_ms)
+            logger.debug(
+                "Model call",
+                task=task,
+                model=model_name(model),
+                escalated=escalate,
+                elapsed_ms=round(elapsed_ms, 3),
+            )
+            return result
+
+        raise last_error
+
+    def stats_snapshot(self) -> dict[str, dict[str, Any]]:
+        return {
+            name: {**stats.snapshot(), "healthy": self.is_healthy(name)}
+            for name, stats in self._stats.items()
+        }
+
+
+@cache
+def get_model_router() -> ModelRouter:
+    """설정에 따라 구성한 공유 ModelRouter를 반환합니다."""
+    settings = get_settings()
+    return ModelRouter(
+        tiers=settings.model_tiers,
+        task_tiers=settings.node_model_tiers,
+        escalation_tier=settings.model_escalation_tier,
+        ewma_alpha=settings.model_ewma_alpha,
+        max_error_rate=settings.model_max_error_rate,
+        unhealthy_cooldown_s=settings.model_unhealthy_cooldown_s,
+    )
@@ -0,0 +1,175 @@
+"""Local profiling of SQL results so large result sets are summarized
+before they are sent to the LLM."""
+
+import json
+from collections.abc import Hashable
+from decimal import Decimal
+from numbers import Number
+from typing import TYPE_CHECKING
+
+# pandas는 큰 결과를 요약할 때만 필요하므로 함수 안에서 import 합니다.
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 그룹 요약에 사용할 범주형 컬럼의 최대 고유값 수
+MAX_GROUP_CARDINALITY = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimates the number of LLM tokens in a text."""
+    return len(text) // 4 + 1
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.0f}" if value.is_integer() else f"{value:.2f}"
+    return str(value)
+
+
+def _coerce_numeric(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Converts object columns holding only numbers (e.g. Decimal values that
+    asyncpg returns for NUMERIC, SUM() and AVG()) to a numeric dtype.
+    """
+    import pandas as pd
+
+    for column in df.columns:
+        series = df[column]
+        if series.dtype != object:
+            continue
+        values = series.dropna()
+        if values.empty or not all(
+            isinstance(v, Number | Decimal) and not isinstance(v, bool)
+            for v in values
+        ):
+            continue
+        try:
+            df[column] = pd.to_numeric(series)
+        except (TypeError, ValueError):
+            continue
+    return df
+
+
+def _to_hashable(value):
+    if isinstance(value, Hashable):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _stringify_unhashable(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Returns a copy in which list/dict cells (e.g. array_agg() or json
+    columns) are replaced by their JSON text, so they can be counted and
+    grouped like any other text value.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if df[column].dtype != object:
+            continue
+        values = df[column]
+        if all(isinstance(v, Hashable) for v in values):
+            continue
+        df[column] = values.map(_to_hashable)
+    return df
+
+
+def _column_stats(df: "pd.DataFrame", top_k: int) -> list[str]:
+    import pandas as pd
+
+    lines = []
+    for column in df.columns:
+        series = df[column]
+        nulls = int(series.isna().sum())
+        if pd.api.types.is_numeric_dtype(series) and not (
+            pd.api.types.is_bool_dtype(series)
+        ):
+            lines.append(
+                f"- {column} (numeric): min={_format_value(series.min())}, "
+                f"max={_format_value(series.max())}, "
+                f"mean={_format_value(series.mean())}, "
+                f"median={_format_value(series.median())}, "
+                f"sum={_format_value(series.sum())}, nulls={nulls}"
+            )
+        else:
+            counts = series.astype(str).value_counts().head(top_k)
+            top = ", ".join(
+                f"{value} ({count})" for value, count in counts.items()
+            )
+            lines.append(
+                f"- {column} (text): distinct={series.nunique()}, "
+                f"top {top_k}=[{top}], nulls={nulls}"
+            )
+    return lines
+
+
+def _group_summaries(df: "pd.DataFrame", top_k: int) -> list[str]:
+    import pandas as pd
+
+    numeric_columns = [
+        c
+        for c in df.columns
+        if pd.api.types.is_numeric_dtype(df[c])
+        and not pd.api.types.is_bool_dtype(df[c])
+    ]
+    group_columns = [
+        c
+        for c in df.columns
+        if c not in numeric_columns
+        and 1 < df[c].nunique() <= MAX_GROUP_CARDINALITY
+    ]
+    if not numeric_columns or not group_columns:
+        return []
+
+    lines = []
+    for group_column in group_columns:
+        grouped = df.groupby(group_column, dropna=False)[numeric_columns].agg(
+            ["count", "mean", "sum"]
+        )
+        grouped = grouped.sort_values(
+            (numeric_columns[0], "count"), ascending=False
+        ).head(top_k)
+        lines.append(f"- by {group_column}:")
+        for key, row in grouped.iterrows():
+            stats = "; ".join(
+                f"{column} count={int(row[(column, 'count')])} "
+                f"mean={_format_value(row[(column, 'mean')])} "
+                f"sum={_format_value(row[(column, 'sum')])}"
+                for column in numeric_columns
+            )
+            lines.append(f"    - {key}: {stats}")
+    return lines
+
+
+def summarize_rows(rows: list[dict], sample_size: int, top_k: int) -> str:
+    """
+    Builds a compact text summary of a query result: column statistics,
+    top values, group aggregates over all rows and an evenly spaced row
+    sample.
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = _coerce_numeric(pd.DataFrame(rows))
+    # 통계와 그룹 요약은 해시 가능한 값이 필요하고, 표본은 원래 값을 씁니다.
+    profiled = _stringify_unhashable(df)
+    sections = [
+        f"Total rows: {len(df)}, columns: {len(df.columns)}",
+        "Column statistics (computed over all rows):",
+        *_column_stats(profiled, top_k),
+    ]
+    if group_lines := _group_summaries(profiled, top_k):
+        sections.append(
+            f"Group summaries (top {top_k} groups, computed over all rows):"
+        )
+        sections.extend(group_lines)
+
+    # 앞부분에 치우치지 않도록 전체 구간에서 고르게 표본을 뽑습니다.
+    positions = np.unique(
+        np.linspace(0, len(df) - 1, num=min(sample_size, len(df)), dtype=int)
+    )
+    sample_df = df.iloc[positions].astype(object)
+    # NaN/NaT는 JSON이 아니므로 null로 바꿉니다.
+    sample = sample_df.where(sample_df.notna(), None).to_dict(orient="records")
+    sections.append(f"Representative sample ({len(sample)} rows):")
+    sections.append(json.dumps(sample, ensure_ascii=False, default=str))
+    return "\n".join(sections)
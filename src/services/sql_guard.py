@@ -0,0 +1,186 @@
+"""In-process analysis of generated SQL before it is sent to PostgreSQL."""
+
+from dataclasses import dataclass, field
+
+import sqlglot
+from sqlglot import exp
+from sqlglot.errors import SqlglotError
+
+DIALECT = "postgres"
+
+# 읽기 전용 쿼리 안에 나타나면 안 되는 노드
+WRITE_EXPRESSIONS = (
+    exp.Insert,
+    exp.Update,
+    exp.Delete,
+    exp.Merge,
+    exp.Create,
+    exp.Drop,
+    exp.Alter,
+    exp.TruncateTable,
+    exp.Command,
+    exp.Into,
+    # SELECT ... FOR UPDATE / FOR SHARE는 행 잠금을 잡습니다.
+    exp.Lock,
+)
+
+# 설정 변경, 지연, 파일/네트워크 접근, 시퀀스 변경, 임의 쿼리 실행처럼
+# 읽기 전용 조회에 필요 없는 함수
+DENIED_FUNCTIONS = frozenset(
+    {
+        "set_config",
+        "current_setting",
+        "nextval",
+        "setval",
+        "currval",
+        "lastval",
+    }
+)
+DENIED_FUNCTION_PREFIXES = (
+    "pg_",
+    "lo_",
+    "dblink",
+    "query_to_xml",
+    "cursor_to_xml",
+    "table_to_xml",
+    "schema_to_xml",
+    "database_to_xml",
+)
+
+# 생성 쿼리가 읽을 수 있는 스키마 (내부 테이블은 다른 스키마에 있습니다)
+ALLOWED_SCHEMAS = frozenset({"", "public"})
+
+
+@dataclass
+class SqlAnalysis:
+    """Result of analyzing a generated SQL query."""
+
+    # 실행할 쿼리 (LIMIT 주입 후 정규화된 형태)
+    sql: str | None = None
+    errors: list[str] = field(default_factory=list)
+    limit_injected: bool = False
+
+
+def _derived_names(expression: exp.Expression) -> set[str]:
+    """Names introduced by the query itself: CTEs, aliases, derived tables."""
+    names = {cte.alias_or_name.lower() for cte in expression.find_all(exp.CTE)}
+    names |= {
+        alias.alias.lower()
+        for alias in expression.find_all(exp.Alias)
+        if alias.alias
+    }
+    for table_alias in expression.find_all(exp.TableAlias):
+        if table_alias.name:
+            names.add(table_alias.name.lower())
+        names |= {column.name.lower() for column in table_alias.columns}
+    return names
+
+
+def _check_functions(expression: exp.Expression) -> list[str]:
+    errors = []
+    for func in expression.find_all(exp.Anonymous):
+        name = func.name.lower()
+        if name in DENIED_FUNCTIONS or name.startswith(
+            DENIED_FUNCTION_PREFIXES
+        ):
+            errors.append(f"Function '{func.name}' is not allowed.")
+    return errors
+
+
+def _check_schemas(expression: exp.Expression) -> list[str]:
+    errors = []
+    for table in expression.find_all(exp.Table):
+        if table.catalog or table.db.lower() not in ALLOWED_SCHEMAS:
+            errors.append(
+                f"Table '{table.sql(dialect=DIALECT)}' is outside the "
+                "public schema."
+            )
+    return errors
+
+
+def _check_references(
+    expression: exp.Expression, schema: dict[str, set[str]]
+) -> list[str]:
+    errors = []
+    derived = _derived_names(expression)
+
+    # alias -> 실제 테이블 이름
+    tables: dict[str, str] = {}
+    for table in expression.find_all(exp.Table):
+        if not isinstance(table.this, exp.Identifier):
+            # generate_series(...) 같은 테이블 함수
+            continue
+        name = table.name.lower()
+        # public.<name>은 같은 이름의 CTE가 아니라 실제 테이블입니다.
+        if name in derived and name not in schema and not table.db:
+            continue
+        if name not in schema:
+            errors.append(f"Unknown table '{table.name}'.")
+            continue
+        tables[(table.alias or table.name).lower()] = name
+
+    referenced_columns = set().union(
+        *(schema[name] for name in tables.values())
+    )
+    for column in expression.find_all(exp.Column):
+        if isinstance(column.this, exp.Star):
+            continue
+        name = column.name.lower()
+        qualifier = column.table.lower()
+        if qualifier:
+            table_name = tables.get(qualifier)
+            if table_name and name not in schema[table_name]:
+                errors.append(
+                    f"Unknown column '{column.name}' in table '{table_name}'."
+                )
+        elif name not in referenced_columns and name not in derived:
+            errors.append(f"Unknown column '{column.name}'.")
+    return errors
+
+
+def analyze_sql(
+    sql: str, schema: dict[str, set[str]], default_limit: int | None
+) -> SqlAnalysis:
+    """
+    Parses a generated query and validates it locally: exactly one read-only
+    statement without denied functions or row locks, public tables and
+    columns that exist in the schema, and a LIMIT
+    (injected when absent). Only queries without errors should be sent to
+    the database.
+    """
+    analysis = SqlAnalysis()
+    try:
+        statements = [
+            s for s in sqlglot.parse(sql, read=DIALECT) if s is not None
+        ]
+    except SqlglotError as e:
+        # ParseError뿐 아니라 TokenError(닫히지 않은 문자열 등)도 잡습니다.
+        analysis.errors.append(f"SQL parse error: {str(e).splitlines()[0]}")
+        return analysis
+
+    if len(statements) != 1:
+        analysis.errors.append(
+            f"Exactly one statement is allowed, got {len(statements)}."
+        )
+        return analysis
+
+    expression = statements[0]
+    if not isinstance(expression, exp.Query) or any(
+        expression.find_all(*WRITE_EXPRESSIONS)
+    ):
+        analysis.errors.append("Only read-only SELECT queries are allowed.")
+        return analysis
+
+    analysis.errors.extend(_check_functions(expression))
+    analysis.errors.extend(_check_schemas(expression))
+    if schema:
+        analysis.errors.extend(_check_references(expression, schema))
+    if analysis.errors:
+        return analysis
+
+    if default_limit and not expression.args.get("limit"):
+        expression = expression.limit(default_limit)
+        analysis.limit_injected = True
+
+    analysis.sql = expression.sql(dialect=DIALECT)
+    return analysis
@@ -1,15 +1,46 @@
+import asyncio
+import json
+
 import structlog
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import END, StateGraph
-from pydantic_ai import Agent
 from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 
-from src.database.connection import AsyncSessionLocal
+from configs.settings import get_settings
+from src.database.connection import new_session
+from src.database.utils import parse_db_schema
 from src.resources.prompts import Prompts
 from src.schemas.agent_schemas import GraphState, Intent, ThoughtAndSQL
+from src.services.model_router import get_model_router
+from src.services.result_profiler import estimate_tokens, summarize_rows
+from src.services.sql_guard import analyze_sql
 
 # 로거 설정
 logger = structlog.get_logger(__name__)
 
+# --- Conversation Memory ---
+
+
+def _format_conversation(state: GraphState) -> str:
+    """Renders the compacted conversation memory for use in prompts."""
+    parts = []
+    if summary := state.get("history_summary"):
+        parts.append(f"Summary of earlier turns: {summary}")
+    for message in state.get("messages", []):
+        role = "User" if isinstance(message, HumanMessage) else "Assistant"
+        parts.append(f"{role}: {message.content}")
+    if previous_sql := state.get("previous_sql_query"):
+        parts.append(f"Previous SQL query: {previous_sql}")
+    if previous_result := state.get("previous_execution_result"):
+        max_chars = get_settings().memory_context_max_chars
+        if len(previous_result) > max_chars:
+            previous_result = previous_result[:max_chars] + " ...(truncated)"
+        parts.append(f"Previous query result: {previous_result}")
+    return "\n".join(parts) if parts else "None"
+
+
 # --- Agent Nodes ---
 
 
@@ -17,11 +48,14 @@ async def intent_classifier_node(state: GraphState):
     """Classifies the user's question intent using an LLM agent."""
     logger.info("Executing node: intent_classifier")
 
-    intent_agent = Agent("openai:gpt-4o", output_type=Intent)
-    prompt = Prompts.classify_intent(state["question"])
+    prompt = Prompts.classify_intent(
+        state["question"], conversation=_format_conversation(state)
+    )
 
     try:
-        result = await intent_agent.run(prompt)
+        result = await get_model_router().run(
+            "intent", prompt, output_type=Intent
+        )
         intent = result.output.intent
         logger.info("Intent classification complete", intent=intent)
     except Exception as e:
@@ -30,13 +64,32 @@ async def intent_classifier_node(state: GraphState):
         )
         intent = "unknown"
 
-    # Initialize thought_history list
-    return {"intent": intent, "thought_history": [], "messages": []}
+    # Carry the last successful query of this thread over as context for
+    # follow-up questions, then clear the per-turn fields.
+    update = {
+        "intent": intent,
+        "thought_history": [],
+        "sql_query": None,
+        "execution_result": None,
+        "result_summary": None,
+        "result_token_savings": None,
+    }
+    if state.get("sql_query"):
+        update["previous_sql_query"] = state["sql_query"]
+        update["previous_execution_result"] = state.get("execution_result")
+    return update
 
 
 async def sql_generator_node(state: GraphState):
-    """Generates a SQL query and a thought about it."""
-    logger.info("Executing node: sql_generator")
+    """
+    Generates a SQL query and a thought about it. Retries after a failed
+    reflection are escalated to the larger model tier.
+    """
+    attempts = state.get("sql_attempts", 0) + 1
+    escalate = attempts > 1
+    logger.info(
+        "Executing node: sql_generator", attempt=attempts, escalated=escalate
+    )
 
     reflection_feedback = "\n".join(state.get("reflection", []))
     prompt = Prompts.generate_sql(
@@ -45,12 +98,13 @@ async def sql_generator_node(state: GraphState):
         if reflection_feedback
         else "None",
         question=state["question"],
+        conversation=_format_conversation(state),
     )
 
-    sql_agent = Agent("openai:gpt-4o", output_type=ThoughtAndSQL)
-
     try:
-        result = await sql_agent.run(prompt)
+        result = await get_model_router().run(
+            "sql", prompt, output_type=ThoughtAndSQL, escalate=escalate
+        )
         thought = result.output.thought
         sql_query = result.output.query
 
@@ -61,12 +115,20 @@ async def sql_generator_node(state: GraphState):
         # Add thought to state
         thought_history = state.get("thought_history", []) + [thought]
 
-        return {"thought_history": thought_history, "sql_query": sql_query}
+        return {
+            "thought_history": thought_history,
+            "sql_query": sql_query,
+            "sql_attempts": attempts,
+        }
 
     except Exception as e:
         logger.error("Error during SQL generation", error=str(e), exc_info=True)
         # Set reflection to indicate error and route to final_answer
-        return {"reflection": [f"Error during SQL generation: {e}"]}
+        return {
+            "reflection": [f"Error during SQL generation: {e}"],
+            "sql_query": None,
+            "sql_attempts": attempts,
+        }
 
 
 async def reflection_node(state: GraphState):
@@ -76,33 +138,61 @@ async def reflection_node(state: GraphState):
     sql_query = state.get("sql_query")
     reflections = []
 
-    if not sql_query or not sql_query.strip().lower().startswith("select"):
-        logger.warning(
-            "No valid SQL query found for reflection.", sql_query=sql_query
-        )
+    if not sql_query:
+        logger.warning("No SQL query found for reflection.")
         reflections.append(
             "An error occurred during the SQL generation step. "
             "No valid SELECT query was generated."
         )
         return {"reflection": reflections, "sql_query": None}
 
-    async with AsyncSessionLocal() as session:
+    # Parse and check the query locally first, so that only plausibly valid,
+    # read-only SQL reaches the database.
+    analysis = analyze_sql(
+        sql_query,
+        schema=parse_db_schema(state["db_schema"]),
+        default_limit=get_settings().sql_default_limit,
+    )
+    if analysis.errors:
+        logger.warning(
+            "SQL query rejected by local analysis", errors=analysis.errors
+        )
+        reflections.extend(
+            f"Query validation error: {error}" for error in analysis.errors
+        )
+        reflections.append("Please check the schema again and correct it.")
+        return {"reflection": reflections, "sql_query": None}
+
+    sql_query = analysis.sql
+    logger.info(
+        "SQL query passed local analysis",
+        limit_injected=analysis.limit_injected,
+    )
+
+    async with new_session() as session:
         try:
             # Validate query using EXPLAIN
             await session.execute(text(f"EXPLAIN {sql_query}"))
             logger.info("SQL query syntax validation passed (EXPLAIN).")
-        except Exception as e:
-            logger.warning(
-                "SQL query syntax error", error=str(e), exc_info=True
-            )
+        except DBAPIError as e:
+            # 생성된 쿼리의 문법/스키마 오류는 예상된 실패이므로
+            # traceback 없이 기록합니다.
+            logger.warning("SQL query syntax error", error=str(e.orig))
             reflections.append(
                 f"Query syntax error: {e}. "
                 f"Please check the schema again and correct it."
             )
+        except Exception as e:
+            logger.error(
+                "Unexpected error during SQL validation",
+                error=str(e),
+                exc_info=True,
+            )
+            reflections.append(f"Query validation failed: {e}")
 
     if not reflections:
         logger.info("Reflection result: Query is valid.")
-        return {"reflection": []}
+        return {"reflection": [], "sql_query": sql_query}
     else:
         logger.info(
             "Reflection result: Improvements needed.", reflections=reflections
@@ -119,20 +209,61 @@ async def sql_executor_node(state: GraphState):
         logger.error("sql_executor_node called with no query.")
         return {"execution_result": "Error: No SQL query to execute."}
 
-    async with AsyncSessionLocal() as session:
+    async with new_session() as session:
         try:
             result = await session.execute(text(sql_query))
             result_dicts = [dict(row) for row in result.mappings()]
             logger.info(
                 "SQL execution successful", result_count=len(result_dicts)
             )
-            return {"execution_result": str(result_dicts)}
+        except DBAPIError as e:
+            logger.warning("SQL execution failed", error=str(e.orig))
+            return {"execution_result": f"Error executing query: {e}"}
         except Exception as e:
             logger.error(
                 "Error during SQL execution", error=str(e), exc_info=True
             )
             return {"execution_result": f"Error executing query: {e}"}
 
+    settings = get_settings()
+    execution_result = json.dumps(result_dicts, ensure_ascii=False, default=str)
+    raw_tokens = estimate_tokens(execution_result)
+    if raw_tokens <= settings.synthesis_token_budget:
+        return {"execution_result": execution_result}
+
+    # 큰 결과는 통계, 그룹 요약, 표본으로 압축한 뒤 LLM에 전달합니다.
+    try:
+        result_summary = await asyncio.to_thread(
+            summarize_rows,
+            result_dicts,
+            sample_size=settings.result_sample_rows,
+            top_k=settings.result_top_k,
+        )
+    except Exception as e:
+        # 요약에 실패해도 쿼리는 성공했으므로 잘라낸 원본 결과로 진행합니다.
+        logger.error(
+            "Result profiling failed, using truncated result",
+            error=str(e),
+            exc_info=True,
+        )
+        max_chars = settings.synthesis_token_budget * 4
+        result_summary = (
+            f"Total rows: {len(result_dicts)}. First {max_chars} characters "
+            f"of the result:\n{execution_result[:max_chars]} ...(truncated)"
+        )
+    token_savings = raw_tokens - estimate_tokens(result_summary)
+    logger.info(
+        "Execution result profiled",
+        result_count=len(result_dicts),
+        raw_tokens=raw_tokens,
+        token_savings=token_savings,
+    )
+    return {
+        "execution_result": execution_result,
+        "result_summary": result_summary,
+        "result_token_savings": token_savings,
+    }
+
 
 async def synthesize_result_node(state: GraphState):
     """
@@ -141,17 +272,19 @@ async def synthesize_result_node(state: GraphState):
     """
     logger.info("Executing node: synthesize_result")
 
-    if (
-        state.get("execution_result")
-        and "Error" not in state["execution_result"]
-    ):
-        prompt = Prompts.synthesize_result(
-            question=state["question"],
-            execution_result=state["execution_result"],
-        )
-        thought_agent = Agent("openai:gpt-4o")
+    execution_result = state.get("execution_result")
+    if execution_result and not execution_result.startswith("Error"):
+        if state.get("result_summary"):
+            prompt = Prompts.synthesize_profiled_result(
+                question=state["question"],
+                result_summary=state["result_summary"],
+            )
+        else:
+            prompt = Prompts.synthesize_result(
+                question=state["question"], execution_result=execution_result
+            )
         try:
-            result = await thought_agent.run(prompt)
+            result = await get_model_router().run("synthesis", prompt)
             thought = result.output
             logger.info("Result synthesis successful.", thought=thought)
             return {"thought": thought}
@@ -177,13 +310,15 @@ async def final_answer_node(state: GraphState):
     """Generates the final answer to be shown to the user."""
     logger.info("Executing node: final_answer")
     intent = state["intent"]
-    final_answer_agent = Agent("openai:gpt-4o")
+    router = get_model_router()
 
     if intent == "greeting":
         answer = "Hello! How can I help you?"
     elif intent == "chit_chat":
-        prompt = Prompts.generate_chit_chat(state["question"])
-        result = await final_answer_agent.run(prompt)
+        prompt = Prompts.generate_chit_chat(
+            state["question"], conversation=_format_conversation(state)
+        )
+        result = await router.run("chit_chat", prompt)
         answer = result.output
     elif intent == "unknown":
         answer = "I'm sorry, I didn't understand your question. "
@@ -192,13 +327,53 @@ async def final_answer_node(state: GraphState):
         prompt = Prompts.generate_final_answer(
             thought=state["thought"], question=state["question"]
         )
-        result = await final_answer_agent.run(prompt)
+        result = await router.run("answer", prompt)
         answer = result.output
     else:
         answer = "I'm sorry, I couldn't find an answer to your question."
 
     logger.info("Final answer generation complete", final_answer=answer)
-    return {"answer": answer, "is_final": True}
+    return {
+        "answer": answer,
+        "is_final": True,
+        "messages": [
+            HumanMessage(content=state["question"]),
+            AIMessage(content=answer),
+        ],
+    }
+
+
+async def compact_memory_node(state: GraphState):
+    """
+    Folds conversation turns beyond the configured window into a running
+    summary so that prompt size stays bounded across a thread.
+    """
+    messages = list(state.get("messages", []))
+    overflow = len(messages) - get_settings().memory_max_messages
+    if overflow <= 0:
+        return {}
+
+    logger.info("Executing node: compact_memory", compacted=overflow)
+    older = messages[:overflow]
+    transcript = "\n".join(
+        f"{'User' if isinstance(m, HumanMessage) else 'Assistant'}: {m.content}"
+        for m in older
+    )
+    prompt = Prompts.summarize_history(
+        previous_summary=state.get("history_summary") or "None",
+        transcript=transcript,
+    )
+    try:
+        result = await get_model_router().run("summary", prompt)
+    except Exception as e:
+        # 요약에 실패하면 다음 턴에 다시 시도합니다.
+        logger.error("Error during memory compaction", error=str(e))
+        return {}
+
+    return {
+        "history_summary": result.output,
+        "messages": [RemoveMessage(id=m.id) for m in older],
+    }
 
 
 # --- Graph Edges and Configuration ---
@@ -217,8 +392,17 @@ def route_after_reflection(state: GraphState):
     """Determines the next node after SQL reflection."""
     logger.info("Routing decision: after SQL reflection")
 
-    # If reflection has found issues, stop and go to the final answer.
+    # If reflection has found issues, regenerate the query with the
+    # feedback (on the escalated model) until the attempt budget runs out,
+    # then stop and go to the final answer.
     if state.get("reflection"):
+        if state.get("sql_attempts", 0) < get_settings().sql_max_attempts:
+            logger.warning(
+                "Reflection found issues. Regenerating the SQL query.",
+                reflections=state["reflection"],
+                attempts=state.get("sql_attempts", 0),
+            )
+            return "sql_generator"
         logger.warning(
             "Reflection found issues. "
             "Halting execution and synthesizing result.",
@@ -239,6 +423,7 @@ workflow.add_node("reflection", reflection_node)
 workflow.add_node("sql_executor", sql_executor_node)
 workflow.add_node("synthesize_result", synthesize_result_node)
 workflow.add_node("final_answer", final_answer_node)
+workflow.add_node("compact_memory", compact_memory_node)
 
 workflow.set_entry_point("intent_classifier")
 
@@ -251,12 +436,19 @@ workflow.add_edge("sql_generator", "reflection")
 workflow.add_conditional_edges(
     "reflection",
     route_after_reflection,
-    # If reflection fails, it now goes to synthesize, not directly to the end.
-    {"final_answer": "synthesize_result", "sql_executor": "sql_executor"},
+    # If reflection fails, retry generation, then fall back to synthesize.
+    {
+        "sql_generator": "sql_generator",
+        "synthesize_result": "synthesize_result",
+        "sql_executor": "sql_executor",
+    },
 )
 workflow.add_edge("sql_executor", "synthesize_result")
 workflow.add_edge("synthesize_result", "final_answer")
-workflow.add_edge("final_answer", END)
+workflow.add_edge("final_answer", "compact_memory")
+workflow.add_edge("compact_memory", END)
+
 
-# Compile the graph
-agent_app = workflow.compile()
+def build_agent_app(checkpointer: BaseCheckpointSaver | None = None):
+    """Compiles the graph, persisting thread state with the checkpointer."""
+    return workflow.compile(checkpointer=checkpointer)
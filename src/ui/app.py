@@ -1,8 +1,11 @@
 import json
 import logging
 import os
+import time
+from collections.abc import Iterator
 
-import requests
+import httpx
+import pandas as pd
 import streamlit as st
 
 # Configure logger
@@ -14,7 +17,116 @@ st.title("💬 Text-to-SQL Chatbot")
 
 # --- Backend API Configuration ---
 # It's better to use an environment variable for the API URL
-API_URL = os.getenv("API_URL", "http://127.0.0.1:8000/agent/invoke")
+API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
+# 연결이 끊겼을 때 Last-Event-ID로 이어받기를 시도하는 횟수
+MAX_RECONNECTS = 5
+# 결과 테이블 한 페이지에 보여줄 행 수
+PAGE_SIZE = 100
+
+
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """모든 세션과 rerun이 공유하는 keep-alive 커넥션 풀 클라이언트."""
+    return httpx.Client(
+        base_url=API_BASE_URL,
+        # 스트림은 답변이 끝날 때까지 열려 있어 읽기 타임아웃을 길게 둡니다.
+        timeout=httpx.Timeout(10.0, read=120.0),
+        limits=httpx.Limits(max_keepalive_connections=10),
+    )
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def to_dataframe(raw_result: str) -> pd.DataFrame:
+    """JSON 결과 문자열을 DataFrame으로 변환합니다 (rerun 간 캐시)."""
+    return pd.DataFrame(json.loads(raw_result))
+
+
+def iter_sse(lines: Iterator[str]) -> Iterator[tuple[str | None, str]]:
+    """SSE 스트림을 (event id, data) 단위로 나눕니다.
+
+    빈 줄에서 이벤트를 내보내고, 여러 줄의 data 필드는 줄바꿈으로 잇고,
+    ':'로 시작하는 주석 줄은 무시합니다.
+    """
+    event_id, data_lines = None, []
+    for line in lines:
+        if not line:
+            if data_lines:
+                yield event_id, "\n".join(data_lines)
+            event_id, data_lines = None, []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        value = value.removeprefix(" ")
+        if field == "data":
+            data_lines.append(value)
+        elif field == "id":
+            event_id = value
+    if data_lines:
+        yield event_id, "\n".join(data_lines)
+
+
+def stream_agent_events(question: str, thread_id: str | None) -> Iterator[dict]:
+    """질문을 작업으로 제출하고, 끊기면 이어받으며 이벤트를 내보냅니다."""
+    client = get_http_client()
+    response = client.post(
+        "/agent/jobs", json={"question": question, "thread_id": thread_id}
+    )
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+
+    last_event_id = None
+    for attempt in range(MAX_RECONNECTS + 1):
+        headers = {"Last-Event-ID": last_event_id} if last_event_id else {}
+        try:
+            with client.stream(
+                "GET", f"/agent/jobs/{job_id}/events", headers=headers
+            ) as stream:
+                stream.raise_for_status()
+                for event_id, data in iter_sse(stream.iter_lines()):
+                    if event_id is not None:
+                        last_event_id = event_id
+                    try:
+                        event = json.loads(data)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Could not decode JSON: {data}")
+                        continue
+                    if event.get("type") == "done":
+                        return
+                    yield event
+            # 'done' 없이 스트림이 닫힘: 서버가 재시작되었을 수 있습니다.
+            logger.warning(f"Event stream for job {job_id} closed early")
+        except httpx.TransportError as e:
+            logger.warning(f"Event stream for job {job_id} dropped: {e}")
+        if attempt < MAX_RECONNECTS:
+            time.sleep(min(2**attempt * 0.5, 5.0))
+
+    raise RuntimeError("이벤트 스트림 재연결에 실패했습니다.")
+
+
+@st.fragment
+def render_result_table(raw_result: str, key: str) -> None:
+    """결과를 페이지 단위로 보여줍니다 (페이지 이동 시 이 영역만 rerun)."""
+    try:
+        df = to_dataframe(raw_result)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        st.markdown(raw_result)
+        return
+
+    if len(df) <= PAGE_SIZE:
+        st.dataframe(df)
+        return
+    page_count = -(-len(df) // PAGE_SIZE)
+    page = st.number_input(
+        f"페이지 (총 {page_count}쪽, {len(df)}행)",
+        min_value=1,
+        max_value=page_count,
+        value=1,
+        key=f"page-{key}",
+    )
+    start = (page - 1) * PAGE_SIZE
+    st.dataframe(df.iloc[start : start + PAGE_SIZE])
+
 
 # --- Session State Initialization ---
 if "messages" not in st.session_state:
@@ -25,22 +137,26 @@ if "messages" not in st.session_state:
             "제가 SQL 쿼리를 생성하여 답변해 드립니다.",
         }
     ]
+if "thread_id" not in st.session_state:
+    # 백엔드가 첫 응답에서 발급한 대화 스레드 ID (후속 질문에 재사용)
+    st.session_state.thread_id = None
 
 # --- Chat History Display ---
-for message in st.session_state.messages:
+for index, message in enumerate(st.session_state.messages):
     with st.chat_message(message["role"]):
         # Display thought if it exists
-        if "thought" in message and message["thought"]:
+        if message.get("thought"):
             with st.expander("Agent's Thought"):
                 st.markdown(message["thought"])
         # Display generated_query if it exists
-        if "generated_query" in message and message["generated_query"]:
+        if message.get("generated_query"):
             with st.expander("Generated SQL Query"):
                 st.markdown(f"```sql\n{message['generated_query']}\n```")
         # Display execution_result if it exists
-        if "execution_result" in message and message["execution_result"]:
+        # (raw JSON 문자열로 저장해 두고, DataFrame은 캐시에서 가져옵니다)
+        if message.get("execution_result"):
             with st.expander("SQL Execution Result"):
-                st.dataframe(message["execution_result"])
+                render_result_table(message["execution_result"], str(index))
         # Display content
         st.markdown(message["content"])
 
@@ -67,49 +183,41 @@ if prompt := st.chat_input("질문을 입력하세요..."):
         execution_result = None
 
         try:
-            with requests.post(
-                API_URL, json={"question": prompt}, stream=True, timeout=60
-            ) as response:
-                response.raise_for_status()
-                for line in response.iter_lines():
-                    if line:
-                        decoded_line = line.decode("utf-8")
-                        if decoded_line.startswith("data: "):
-                            try:
-                                event_data = json.loads(decoded_line[6:])
-                                event_type = event_data.get("type")
-                                data = event_data.get("data")
-
-                                if event_type == "sql_query":
-                                    generated_sql = data
-                                    sql_query_container.markdown(
-                                        f"```sql\n{generated_sql}\n```"
-                                    )
-
-                                elif event_type == "thought":
-                                    agent_thought = data
-                                    thought_container.markdown(agent_thought)
-
-                                elif event_type == "execution_result":
-                                    try:
-                                        execution_result = json.loads(data.replace("'", '"'))
-                                        sql_result_container.dataframe(execution_result)
-                                    except (json.JSONDecodeError, TypeError):
-                                        sql_result_container.markdown(data)
-
-                                elif event_type == "answer":
-                                    full_response = data
-                                    message_placeholder.markdown(full_response)
-
-                                elif event_type == "error":
-                                    full_response = f"Error: {data}"
-                                    st.error(full_response)
-                                    break
-
-                            except json.JSONDecodeError:
-                                logger.warning(
-                                    f"Could not decode JSON from stream: {decoded_line}"  # noqa: E501
-                                )
+            for event in stream_agent_events(
+                prompt, st.session_state.thread_id
+            ):
+                event_type = event.get("type")
+                data = event.get("data")
+
+                if event_type == "thread":
+                    st.session_state.thread_id = data
+
+                elif event_type == "sql_query":
+                    generated_sql = data
+                    sql_query_container.markdown(
+                        f"```sql\n{generated_sql}\n```"
+                    )
+
+                elif event_type == "thought":
+                    agent_thought = data
+                    thought_container.markdown(agent_thought)
+
+                elif event_type == "execution_result":
+                    execution_result = data
+                    try:
+                        df = to_dataframe(data)
+                        sql_result_container.dataframe(df.head(PAGE_SIZE))
+                    except (json.JSONDecodeError, TypeError, ValueError):
+                        sql_result_container.markdown(data)
+
+                elif event_type == "answer":
+                    full_response = data
+                    message_placeholder.markdown(full_response)
+
+                elif event_type == "error":
+                    full_response = f"Error: {data}"
+                    st.error(full_response)
+                    break
 
             # Store the full response in session state
             # after the stream is complete
@@ -122,7 +230,16 @@ if prompt := st.chat_input("질문을 입력하세요..."):
             }
             st.session_state.messages.append(assistant_message)
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 429:
+                error_message = "요청이 많아 잠시 후 다시 시도해주세요."
+            else:
+                error_message = f"백엔드 API 호출에 실패했습니다: {e}"
+            st.error(error_message)
+            st.session_state.messages.append(
+                {"role": "assistant", "content": error_message}
+            )
+        except httpx.HTTPError as e:
             error_message = f"백엔드 API 호출에 실패했습니다: {e}"
             st.error(error_message)
             st.session_state.messages.append(
@@ -0,0 +1,259 @@
+import asyncio
+import contextlib
+from types import SimpleNamespace
+
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+
+import src.database.checkpoint_saver as saver_module
+from src.database.checkpoint_saver import PostgresCheckpointSaver
+
+
+class StubResult:
+    def __init__(self, rows=()):
+        self.rows = [SimpleNamespace(**row) for row in rows]
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def scalars(self):
+        return [next(iter(vars(row).values())) for row in self.rows]
+
+
+class StubConnection:
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def execute(self, statement, params=None):
+        await asyncio.sleep(0)
+        if self.engine.fail_writes:
+            raise ConnectionError("database is down")
+        return self.engine.apply(statement, params)
+
+
+class StubEngine:
+    """AsyncEngine을 흉내 내는 메모리 테이블."""
+
+    def __init__(self):
+        self.fail_writes = False
+        self.blobs: dict[str, dict] = {}
+        self.blob_refs: set[tuple[str, str]] = set()
+        self.checkpoints: dict[tuple, dict] = {}
+        self.writes: dict[tuple, dict] = {}
+
+    @contextlib.asynccontextmanager
+    async def begin(self):
+        yield StubConnection(self)
+
+    @contextlib.asynccontextmanager
+    async def connect(self):
+        yield StubConnection(self)
+
+    def apply(self, statement, params):
+        if statement is saver_module.INSERT_BLOB:
+            for row in params:
+                self.blobs.setdefault(row["blob_key"], row)
+        elif statement is saver_module.INSERT_BLOB_REF:
+            self.blob_refs |= {(r["thread_id"], r["blob_key"]) for r in params}
+        elif statement is saver_module.INSERT_CHECKPOINT:
+            for row in params:
+                key = (
+                    row["thread_id"],
+                    row["checkpoint_ns"],
+                    row["checkpoint_id"],
+                )
+                self.checkpoints[key] = row
+        elif statement is saver_module.UPSERT_WRITE:
+            for row in params:
+                key = (
+                    row["thread_id"],
+                    row["checkpoint_ns"],
+                    row["checkpoint_id"],
+                    row["task_id"],
+                    row["idx"],
+                )
+                self.writes[key] = row
+        elif statement is saver_module.SELECT_WRITES:
+            rows = [
+                row
+                for key, row in sorted(self.writes.items())
+                if key[:3]
+                == (
+                    params["thread_id"],
+                    params["checkpoint_ns"],
+                    params["checkpoint_id"],
+                )
+            ]
+            return StubResult(rows)
+        elif statement is saver_module.SELECT_BLOBS:
+            keys = params["blob_keys"]
+            return StubResult(self.blobs[k] for k in keys if k in self.blobs)
+        elif statement is saver_module.DELETE_THREAD_BLOB_REFS:
+            refs = {r for r in self.blob_refs if r[0] == params["thread_id"]}
+            self.blob_refs -= refs
+            return StubResult({"blob_key": key} for _, key in refs)
+        elif statement is saver_module.DELETE_UNREFERENCED_BLOBS:
+            referenced = {key for _, key in self.blob_refs}
+            for key in set(params["blob_keys"]) - referenced:
+                self.blobs.pop(key, None)
+        elif str(statement).lstrip().startswith("DELETE"):
+            table = (
+                self.writes
+                if "graph_checkpoint_writes" in str(statement)
+                else self.checkpoints
+            )
+            for key in [k for k in table if k[0] == params["thread_id"]]:
+                del table[key]
+        else:
+            return self.select_checkpoints(params)
+        return StubResult()
+
+    def select_checkpoints(self, params):
+        rows = [
+            row
+            for (thread_id, ns, checkpoint_id), row in self.checkpoints.items()
+            if thread_id == params["thread_id"]
+            and ns == params["checkpoint_ns"]
+            and params.get("checkpoint_id", checkpoint_id) == checkpoint_id
+        ]
+        return StubResult(
+            sorted(rows, key=lambda row: row["checkpoint_id"], reverse=True)
+        )
+
+
+def config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+async def put(saver, thread_id: str, **channel_values) -> dict:
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = channel_values
+    return await saver.aput(config(thread_id), checkpoint, {}, {})
+
+
+def _saver(engine, **kwargs) -> PostgresCheckpointSaver:
+    return PostgresCheckpointSaver(
+        engine,
+        inline_max_bytes=100,
+        ref_channels=["execution_result"],
+        **kwargs,
+    )
+
+
+def test_large_channel_value_is_stored_as_blob():
+    async def scenario():
+        engine = StubEngine()
+        saver = _saver(engine)
+        large = "row," * 1000
+        stored = await put(saver, "t1", execution_result=large, answer="hi")
+        await saver.aput_writes(stored, [("execution_result", large)], "task")
+        await saver.flush()
+
+        assert len(engine.blobs) == 1
+        assert engine.blob_refs == {("t1", next(iter(engine.blobs)))}
+
+        restored = await saver.aget_tuple(config("t1"))
+
+        assert restored.checkpoint["channel_values"] == {
+            "execution_result": large,
+            "answer": "hi",
+        }
+        assert restored.pending_writes == [("task", "execution_result", large)]
+
+    asyncio.run(scenario())
+
+
+def test_failed_flush_keeps_rows_in_order():
+    async def scenario():
+        engine = StubEngine()
+        saver = _saver(engine)
+        first = await put(saver, "t1", answer="first")
+        second = await put(saver, "t1", answer="second")
+        engine.fail_writes = True
+
+        with pytest.raises(ConnectionError):
+            await saver.flush()
+
+        assert saver._pending_rows() == 2
+        third = await put(saver, "t1", answer="third")
+        engine.fail_writes = False
+        await saver.flush()
+
+        assert saver._pending_rows() == 0
+        assert [key[2] for key in engine.checkpoints] == [
+            stored["configurable"]["checkpoint_id"]
+            for stored in (first, second, third)
+        ]
+
+    asyncio.run(scenario())
+
+
+def test_reads_see_buffered_writes():
+    async def scenario():
+        engine = StubEngine()
+        saver = _saver(engine)
+        stored = await put(saver, "t1", answer="hi")
+        await saver.aput_writes(stored, [("answer", "bye")], "task")
+
+        assert not engine.checkpoints
+
+        restored = await saver.aget_tuple(config("t1"))
+
+        assert restored.config == stored
+        assert restored.pending_writes == [("task", "answer", "bye")]
+
+    asyncio.run(scenario())
+
+
+def test_full_buffer_is_flushed_before_write():
+    async def scenario():
+        engine = StubEngine()
+        saver = _saver(engine, max_pending_rows=2)
+        await put(saver, "t1", answer="1")
+        await put(saver, "t1", answer="2")
+        engine.fail_writes = True
+
+        # DB 장애 중에는 버퍼를 키우지 않고 쓰기가 실패합니다.
+        with pytest.raises(ConnectionError):
+            await put(saver, "t1", answer="3")
+        assert saver._pending_rows() == 2
+
+        engine.fail_writes = False
+        await put(saver, "t1", answer="3")
+
+        assert len(engine.checkpoints) == 2
+        assert saver._pending_rows() == 1
+
+    asyncio.run(scenario())
+
+
+def test_shared_blob_is_deleted_with_its_last_thread():
+    async def scenario():
+        engine = StubEngine()
+        saver = _saver(engine)
+        large = "row," * 1000
+        await put(saver, "t1", execution_result=large)
+        await put(saver, "t2", execution_result=large)
+
+        await saver.adelete_thread("t1")
+
+        assert len(engine.blobs) == 1
+        assert [key[0] for key in engine.checkpoints] == ["t2"]
+        restored = await saver.aget_tuple(config("t2"))
+        assert restored.checkpoint["channel_values"]["execution_result"] == (
+            large
+        )
+
+        await saver.adelete_thread("t2")
+
+        assert not engine.blobs
+        assert not engine.blob_refs
+        assert not engine.checkpoints
+
+    asyncio.run(scenario())
@@ -0,0 +1,59 @@
+from langgraph.checkpoint.base import empty_checkpoint
+
+import src.services.checkpointer as checkpointer
+from src.services.checkpointer import BoundedInMemorySaver
+
+
+def config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+def put(saver: BoundedInMemorySaver, thread_id: str) -> None:
+    saver.put(config(thread_id), empty_checkpoint(), {}, {})
+
+
+def stored_threads(saver: BoundedInMemorySaver) -> set[str]:
+    return {
+        thread_id
+        for thread_id, namespaces in saver.storage.items()
+        if any(namespaces.values())
+    }
+
+
+def test_least_recently_used_thread_is_evicted():
+    saver = BoundedInMemorySaver(max_threads=2)
+    put(saver, "a")
+    put(saver, "b")
+    # 읽기도 사용으로 칩니다.
+    assert saver.get_tuple(config("a")) is not None
+
+    put(saver, "c")
+
+    assert stored_threads(saver) == {"a", "c"}
+    assert saver.get_tuple(config("b")) is None
+    assert saver.evicted_threads == 1
+
+
+def test_idle_threads_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(checkpointer.time, "monotonic", lambda: now[0])
+    saver = BoundedInMemorySaver(max_threads=100, thread_ttl=60.0)
+    put(saver, "old")
+    now[0] += 30
+    put(saver, "recent")
+
+    now[0] += 45
+    put(saver, "new")
+
+    assert stored_threads(saver) == {"recent", "new"}
+
+
+def test_pending_writes_are_deleted_with_the_thread():
+    saver = BoundedInMemorySaver(max_threads=1)
+    put(saver, "a")
+    stored = saver.get_tuple(config("a")).config
+    saver.put_writes(stored, [("answer", "42")], task_id="task")
+
+    put(saver, "b")
+
+    assert not [key for key in saver.writes if key[0] == "a"]
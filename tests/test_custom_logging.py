@@ -0,0 +1,87 @@
+import hashlib
+import json
+
+import pytest
+from structlog.processors import JSONRenderer
+
+import src.core.custom_logging as custom_logging
+from configs.settings import Settings
+from src.core.custom_logging import (
+    emit_audit_payload,
+    limit_payload_fields,
+    summarize_payload,
+)
+
+
+class StubAuditLogger:
+    """감사 로거를 흉내 내어 기록된 이벤트를 모읍니다."""
+
+    def __init__(self):
+        self.events: list[dict] = []
+
+    def info(self, event):
+        self.events.append(event)
+
+
+@pytest.fixture
+def audit(monkeypatch):
+    audit = StubAuditLogger()
+    monkeypatch.setattr(custom_logging, "audit_logger", audit)
+    return audit
+
+
+def use_settings(monkeypatch, **values) -> None:
+    settings = Settings(openai_api_key="test", **values)
+    monkeypatch.setattr(custom_logging, "get_settings", lambda: settings)
+
+
+def render(event_dict: dict) -> dict:
+    for processor in (emit_audit_payload, limit_payload_fields):
+        event_dict = processor(None, "info", event_dict)
+    return json.loads(JSONRenderer()(None, "info", event_dict))
+
+
+def test_off_mode_keeps_only_length_and_hash():
+    text = "SELECT * FROM employees"
+
+    assert summarize_payload(text, "off", 5) == {
+        "len": len(text),
+        "sha256": hashlib.sha256(text.encode()).hexdigest()[:12],
+    }
+
+
+def test_truncated_mode_cuts_at_max_chars():
+    summary = summarize_payload("abcdefghij", "truncated", 4)
+
+    assert summary.startswith("abcd...(+6 chars, sha256=")
+    assert summarize_payload("abcd", "truncated", 4) == "abcd"
+
+
+def test_full_mode_keeps_value():
+    assert summarize_payload(["a", "b"], "full", 1) == ["a", "b"]
+
+
+def test_list_fields_are_joined(monkeypatch):
+    use_settings(
+        monkeypatch, log_payload_mode="truncated", log_payload_max_chars=5
+    )
+    event = {"event": "Reflected", "reflections": ["first", "second"]}
+
+    event = limit_payload_fields(None, "info", event)
+
+    assert event["reflections"].startswith("first...(+7 chars")
+
+
+def test_only_sampled_payload_events_reach_audit_log(monkeypatch, audit):
+    use_settings(monkeypatch, log_payload_mode="off")
+    question = "How many employees are there?"
+
+    rendered = [
+        render({"event": "Question", "question": question, "audit_sampled": s})
+        for s in (True, False)
+    ]
+    render({"event": "Node started", "audit_sampled": True})
+
+    assert all("audit_sampled" not in event for event in rendered)
+    assert rendered[0]["question"]["len"] == len(question)
+    assert audit.events == [{"event": "Question", "question": question}]
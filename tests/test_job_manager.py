@@ -0,0 +1,139 @@
+import asyncio
+
+import pytest
+
+from src.services.job_manager import JobManager, JobQueueFullError
+
+
+class StubJobRepository:
+    """JobRepository를 흉내 내는 메모리 저장소."""
+
+    def __init__(self, *, fail_writes: bool = False):
+        self.fail_writes = fail_writes
+        self.jobs: dict[str, dict] = {}
+        self.events: dict[str, list[tuple[int, dict]]] = {}
+
+    async def create(self, job_id, thread_id, question, owner):
+        await asyncio.sleep(0)
+        self.jobs[job_id] = {
+            "job_id": job_id,
+            "thread_id": thread_id,
+            "question": question,
+            "status": "queued",
+            "owner": owner,
+        }
+        self.events[job_id] = []
+
+    async def mark_running(self, job_id):
+        if self.fail_writes:
+            raise ConnectionError("database is down")
+        self.jobs[job_id]["status"] = "running"
+
+    async def mark_finished(self, job_id, status, answer=None, error=None):
+        if self.fail_writes:
+            raise ConnectionError("database is down")
+        self.jobs[job_id].update(status=status, answer=answer, error=error)
+
+    async def append_event(self, job_id, seq, event):
+        if self.fail_writes:
+            raise ConnectionError("database is down")
+        self.events[job_id].append((seq, event))
+
+    async def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def list_events(self, job_id, after_seq=0):
+        return [item for item in self.events[job_id] if item[0] > after_seq]
+
+
+def _manager(repository, max_queue_depth=10) -> JobManager:
+    return JobManager(
+        agent_app=None,
+        repository=repository,
+        workers=1,
+        max_queue_depth=max_queue_depth,
+        poll_interval=0.01,
+    )
+
+
+async def _follow(manager, job_id, after_seq=0):
+    return [
+        (seq, event["type"])
+        async for seq, event in manager.follow_events(job_id, after_seq)
+    ]
+
+
+def test_job_finishes_when_repository_is_down():
+    async def scenario():
+        repository = StubJobRepository()
+        manager = _manager(repository)
+        job = await manager.submit("question", None)
+        repository.fail_writes = True
+        follower = asyncio.create_task(_follow(manager, job.job_id))
+        await asyncio.sleep(0)
+
+        await manager._run(job)
+
+        assert job.done
+        assert job.job_id not in manager._live
+        events = await asyncio.wait_for(follower, 1)
+        assert events == [(1, "done")]
+        assert manager.metrics_snapshot()["failed"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_submits_respect_queue_depth():
+    async def scenario():
+        repository = StubJobRepository()
+        manager = _manager(repository, max_queue_depth=1)
+
+        results = await asyncio.gather(
+            manager.submit("q1", None),
+            manager.submit("q2", None),
+            return_exceptions=True,
+        )
+
+        assert [type(r).__name__ for r in results] == [
+            "Job",
+            "JobQueueFullError",
+        ]
+        assert len(repository.jobs) == 1
+        with pytest.raises(JobQueueFullError):
+            await manager.submit("q3", None)
+
+    asyncio.run(scenario())
+
+
+def test_follow_polls_jobs_of_other_processes_until_done():
+    async def scenario():
+        repository = StubJobRepository()
+        await repository.create("job", "thread", "question", "other")
+        manager = _manager(repository)
+        follower = asyncio.create_task(_follow(manager, "job"))
+
+        await asyncio.sleep(0.05)
+        await repository.append_event("job", 1, {"type": "answer", "data": ""})
+        await asyncio.sleep(0.05)
+        assert not follower.done()
+        await repository.append_event("job", 2, {"type": "done", "data": ""})
+
+        events = await asyncio.wait_for(follower, 1)
+        assert events == [(1, "answer"), (2, "done")]
+
+    asyncio.run(scenario())
+
+
+def test_follow_ends_finished_job_without_done_event():
+    async def scenario():
+        repository = StubJobRepository()
+        await repository.create("job", "thread", "question", "other")
+        await repository.append_event("job", 1, {"type": "answer", "data": ""})
+        repository.jobs["job"]["status"] = "interrupted"
+        manager = _manager(repository)
+
+        events = await asyncio.wait_for(_follow(manager, "job"), 1)
+
+        assert events == [(1, "answer"), (1, "done")]
+
+    asyncio.run(scenario())
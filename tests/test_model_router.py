@@ -0,0 +1,196 @@
+import asyncio
+
+import httpx
+import pytest
+from pydantic_ai.exceptions import ModelHTTPError, UnexpectedModelBehavior
+from pydantic_ai.messages import ModelResponse, TextPart, ToolCallPart
+from pydantic_ai.models.function import FunctionModel
+
+import src.services.text_to_sql_agent as agent
+from configs.settings import Settings
+from src.services.model_router import ModelRouter, model_name
+
+SCHEMA = "Table employees:\n  - name text\n  - id integer\n"
+
+
+def text_model(name: str, calls: list[str], error: Exception | None = None):
+    """Answers with its own name, or raises error, recording every call."""
+
+    def respond(_messages, _info):
+        calls.append(name)
+        if error is not None:
+            raise error
+        return ModelResponse(parts=[TextPart(name)])
+
+    return FunctionModel(respond, model_name=name)
+
+
+def sql_model(name: str, query: str, calls: list[str]):
+    """Returns a ThoughtAndSQL output with the given query."""
+
+    def respond(_messages, info):
+        calls.append(name)
+        tool = info.output_tools[0].name
+        args = {"thought": f"{name} thought", "query": query}
+        return ModelResponse(parts=[ToolCallPart(tool, args)])
+
+    return FunctionModel(respond, model_name=name)
+
+
+def http_error(name: str) -> ModelHTTPError:
+    return ModelHTTPError(status_code=503, model_name=name, body="unavailable")
+
+
+def make_router(small, large=None, **kwargs) -> ModelRouter:
+    return ModelRouter(
+        tiers={"small": small, "large": large or small},
+        task_tiers={"sql": "small", "answer": "small"},
+        escalation_tier="large",
+        **kwargs,
+    )
+
+
+def run(router: ModelRouter, task: str = "answer", **kwargs) -> str:
+    result = asyncio.run(router.run(task, "question", **kwargs))
+    return result.output
+
+
+def test_fails_over_in_tier_order():
+    calls = []
+    primary = text_model("primary", calls, error=http_error("primary"))
+    backup = text_model("backup", calls)
+    router = make_router([primary, backup])
+
+    assert run(router) == "backup"
+    assert calls == ["primary", "backup"]
+    stats = router.stats_snapshot()
+    assert stats["function:primary"]["failures"] == 1
+    assert stats["function:backup"]["failures"] == 0
+
+
+def test_connection_errors_wrapped_by_the_sdk_fail_over():
+    calls = []
+    wrapped = RuntimeError("connection failed")
+    wrapped.__cause__ = httpx.ConnectError("refused")
+    router = make_router(
+        [text_model("primary", calls, error=wrapped), text_model("b", calls)]
+    )
+
+    assert run(router) == "b"
+
+
+def test_other_errors_are_raised_without_failover():
+    calls = []
+    error = UnexpectedModelBehavior("invalid output")
+    primary = text_model("primary", calls, error=error)
+    router = make_router([primary, text_model("backup", calls)])
+
+    with pytest.raises(UnexpectedModelBehavior):
+        run(router)
+
+    assert calls == ["primary"]
+    assert router.stats_snapshot()["function:primary"]["failures"] == 0
+
+
+def test_raises_last_error_when_all_candidates_fail():
+    calls = []
+    router = make_router(
+        [
+            text_model("a", calls, error=http_error("a")),
+            text_model("b", calls, error=http_error("b")),
+        ]
+    )
+
+    with pytest.raises(ModelHTTPError, match="b"):
+        run(router)
+    assert calls == ["a", "b"]
+
+
+def test_unhealthy_model_is_demoted_until_cooldown():
+    calls = []
+    flaky = text_model("flaky", calls, error=http_error("flaky"))
+    steady = text_model("steady", calls)
+    router = make_router(
+        [flaky, steady],
+        ewma_alpha=1.0,
+        max_error_rate=0.5,
+        unhealthy_cooldown_s=3600,
+    )
+
+    run(router)
+    calls.clear()
+    run(router)
+
+    assert not router.is_healthy(flaky)
+    assert calls == ["steady"]
+    assert [model_name(m) for m in router.candidates("answer")] == [
+        "function:steady",
+        "function:flaky",
+    ]
+
+
+def test_demoted_model_is_retried_after_cooldown():
+    calls = []
+    flaky = text_model("flaky", calls, error=http_error("flaky"))
+    router = make_router(
+        [flaky, text_model("steady", calls)],
+        ewma_alpha=1.0,
+        unhealthy_cooldown_s=0.0,
+    )
+
+    run(router)
+
+    assert router.is_healthy(flaky)
+    assert model_name(router.candidates("answer")[0]) == "function:flaky"
+
+
+def test_faster_model_is_tried_first():
+    calls = []
+    slow = text_model("slow", calls)
+    fast = text_model("fast", calls)
+    router = make_router([slow, fast])
+    router._stats_for(slow).record_success(500.0)
+    router._stats_for(fast).record_success(50.0)
+
+    assert run(router) == "fast"
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = Settings(openai_api_key="test", sql_max_attempts=2)
+    monkeypatch.setattr(agent, "get_settings", lambda: settings)
+    return settings
+
+
+@pytest.mark.usefixtures("settings")
+def test_rejected_query_is_regenerated_on_escalation_tier(monkeypatch):
+    calls = []
+    router = make_router(
+        [sql_model("small", "SELECT salary FROM payroll", calls)],
+        [sql_model("large", "SELECT name FROM employees", calls)],
+    )
+    monkeypatch.setattr(agent, "get_model_router", lambda: router)
+    state = {"question": "Who works here?", "db_schema": SCHEMA}
+
+    state |= asyncio.run(agent.sql_generator_node(state))
+    state |= asyncio.run(agent.reflection_node(state))
+
+    assert state["sql_query"] is None
+    assert "Unknown table 'payroll'." in state["reflection"][0]
+    assert agent.route_after_reflection(state) == "sql_generator"
+
+    state |= asyncio.run(agent.sql_generator_node(state))
+
+    assert calls == ["small", "large"]
+    assert state["sql_query"] == "SELECT name FROM employees"
+    assert state["sql_attempts"] == 2
+
+
+def test_regeneration_stops_at_sql_max_attempts(settings):
+    state = {"reflection": ["Query validation error: ..."]}
+
+    state["sql_attempts"] = settings.sql_max_attempts - 1
+    assert agent.route_after_reflection(state) == "sql_generator"
+
+    state["sql_attempts"] = settings.sql_max_attempts
+    assert agent.route_after_reflection(state) == "synthesize_result"
@@ -0,0 +1,120 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+import src.services.text_to_sql_agent as agent
+from configs.settings import Settings
+from src.services.result_profiler import estimate_tokens, summarize_rows
+
+
+def _sample(summary: str) -> list[dict]:
+    return json.loads(summary.splitlines()[-1])
+
+
+def test_decimal_columns_are_profiled_as_numeric():
+    rows = [
+        {"dept": "HR" if i % 2 else "IT", "salary": Decimal(f"{1000 + i}.50")}
+        for i in range(50)
+    ]
+
+    summary = summarize_rows(rows, sample_size=5, top_k=3)
+
+    assert (
+        "- salary (numeric): min=1000.50, max=1049.50, mean=1025, "
+        "median=1025, sum=51250, nulls=0" in summary
+    )
+    assert "- by dept:" in summary
+
+
+def test_numeric_looking_strings_stay_text():
+    rows = [{"code": "007"}, {"code": "042"}]
+
+    summary = summarize_rows(rows, sample_size=5, top_k=3)
+
+    assert "- code (text): distinct=2" in summary
+
+
+def test_sample_is_valid_json_with_nulls():
+    rows = [{"id": i, "bonus": None if i % 2 else 1.5} for i in range(10)]
+
+    summary = summarize_rows(rows, sample_size=4, top_k=3)
+
+    assert "NaN" not in summary
+    sample = _sample(summary)
+    assert len(sample) == 4
+    assert {row["bonus"] for row in sample} <= {None, 1.5}
+    assert None in {row["bonus"] for row in sample}
+
+
+def test_sample_is_spread_over_all_rows():
+    rows = [{"id": i} for i in range(100)]
+
+    sample = _sample(summarize_rows(rows, sample_size=3, top_k=3))
+
+    assert [row["id"] for row in sample] == [0, 49, 99]
+
+
+def test_summary_is_smaller_than_raw_result():
+    rows = [{"id": i, "name": f"employee {i}"} for i in range(1000)]
+    raw = json.dumps(rows)
+
+    summary = summarize_rows(rows, sample_size=20, top_k=5)
+
+    assert estimate_tokens(summary) < estimate_tokens(raw) / 10
+
+
+def test_list_valued_columns_are_profiled_as_text():
+    rows = [
+        {"dept": "HR" if i % 2 else "IT", "names": ["a", str(i % 3)], "n": i}
+        for i in range(30)
+    ]
+
+    summary = summarize_rows(rows, sample_size=3, top_k=3)
+
+    assert '- names (text): distinct=3, top 3=[["a", "0"] (10)' in summary
+    assert '    - ["a", "0"]: n count=10' in summary
+    # 표본에는 원래 배열 값이 그대로 남습니다.
+    assert _sample(summary)[0]["names"] == ["a", "0"]
+
+
+class StubResult:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+
+    def mappings(self) -> list[dict]:
+        return self.rows
+
+
+class StubSession:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+
+    async def execute(self, _statement) -> StubResult:
+        return StubResult(self.rows)
+
+
+def test_executor_falls_back_to_truncated_result(monkeypatch):
+    rows = [{"id": i, "name": f"employee {i}"} for i in range(100)]
+
+    @asynccontextmanager
+    async def new_session():
+        yield StubSession(rows)
+
+    def failing_summarize(*_args, **_kwargs):
+        raise TypeError("unhashable type: 'list'")
+
+    settings = Settings(openai_api_key="test", synthesis_token_budget=50)
+    monkeypatch.setattr(agent, "get_settings", lambda: settings)
+    monkeypatch.setattr(agent, "new_session", new_session)
+    monkeypatch.setattr(agent, "summarize_rows", failing_summarize)
+
+    update = asyncio.run(
+        agent.sql_executor_node({"sql_query": "SELECT id, name FROM t"})
+    )
+
+    assert json.loads(update["execution_result"]) == rows
+    summary = update["result_summary"]
+    assert summary.startswith("Total rows: 100. First 200 characters")
+    assert summary.endswith(" ...(truncated)")
+    assert update["execution_result"][:200] in summary
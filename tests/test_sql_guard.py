@@ -0,0 +1,151 @@
+import pytest
+
+from src.services.sql_guard import analyze_sql
+
+SCHEMA = {
+    "employees": {"id", "name", "salary", "department_id"},
+    "departments": {"id", "name"},
+}
+
+
+def test_valid_query_gets_default_limit():
+    analysis = analyze_sql(
+        "SELECT e.name, d.name FROM employees e "
+        "JOIN departments d ON d.id = e.department_id",
+        SCHEMA,
+        default_limit=100,
+    )
+
+    assert analysis.errors == []
+    assert analysis.limit_injected
+    assert analysis.sql.endswith("LIMIT 100")
+
+
+def test_existing_limit_is_kept():
+    analysis = analyze_sql(
+        "SELECT name FROM employees LIMIT 5", SCHEMA, default_limit=100
+    )
+
+    assert analysis.errors == []
+    assert not analysis.limit_injected
+    assert analysis.sql.endswith("LIMIT 5")
+
+
+def test_cte_and_aliases_are_known_names():
+    analysis = analyze_sql(
+        "WITH top AS (SELECT name, salary AS pay FROM employees) "
+        "SELECT name FROM top ORDER BY pay DESC",
+        SCHEMA,
+        default_limit=None,
+    )
+
+    assert analysis.errors == []
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "DELETE FROM employees",
+        "UPDATE employees SET salary = 0",
+        "SELECT * INTO copy FROM employees",
+        "SELECT * FROM employees FOR UPDATE",
+        "SELECT * FROM employees FOR SHARE",
+    ],
+)
+def test_writes_and_row_locks_are_rejected(sql):
+    analysis = analyze_sql(sql, SCHEMA, default_limit=None)
+
+    assert analysis.errors == ["Only read-only SELECT queries are allowed."]
+    assert analysis.sql is None
+
+
+def test_multiple_statements_are_rejected():
+    analysis = analyze_sql(
+        "SELECT 1; DROP TABLE employees", SCHEMA, default_limit=None
+    )
+
+    assert analysis.errors == ["Exactly one statement is allowed, got 2."]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT set_config('statement_timeout', '0', false)",
+        "SELECT pg_sleep(10)",
+        "SELECT pg_read_file('/etc/passwd')",
+        "SELECT current_setting('data_directory')",
+        "SELECT nextval('employees_id_seq')",
+        "SELECT lo_import('/etc/passwd')",
+        "SELECT query_to_xml('DELETE FROM employees', true, true, '')",
+        "SELECT name FROM employees WHERE pg_sleep(1) IS NULL",
+    ],
+)
+def test_denied_functions_are_rejected(sql):
+    analysis = analyze_sql(sql, SCHEMA, default_limit=None)
+
+    assert analysis.errors
+    assert all("is not allowed" in error for error in analysis.errors)
+
+
+def test_allowed_functions_pass():
+    analysis = analyze_sql(
+        "SELECT department_id, count(*), round(avg(salary), 2), "
+        "coalesce(max(name), '-') FROM employees GROUP BY department_id",
+        SCHEMA,
+        default_limit=None,
+    )
+
+    assert analysis.errors == []
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT * FROM agent_internal.agent_jobs",
+        "SELECT * FROM pg_catalog.pg_authid",
+        "WITH x AS (SELECT 1) SELECT * FROM agent_internal.x",
+    ],
+)
+def test_tables_outside_public_are_rejected(sql):
+    analysis = analyze_sql(sql, SCHEMA, default_limit=None)
+
+    assert any("outside the public schema" in e for e in analysis.errors)
+
+
+def test_public_table_is_not_shadowed_by_cte():
+    analysis = analyze_sql(
+        "WITH secrets AS (SELECT 1 AS id) SELECT * FROM public.secrets",
+        SCHEMA,
+        default_limit=None,
+    )
+
+    assert analysis.errors == ["Unknown table 'secrets'."]
+
+
+def test_unknown_tables_and_columns_are_reported():
+    analysis = analyze_sql(
+        "SELECT e.bonus, title FROM employees e JOIN projects p ON true",
+        SCHEMA,
+        default_limit=None,
+    )
+
+    assert analysis.errors == [
+        "Unknown table 'projects'.",
+        "Unknown column 'bonus' in table 'employees'.",
+        "Unknown column 'title'.",
+    ]
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "SELECT FROM WHERE (",
+        # TokenError: 닫히지 않은 문자열
+        "SELECT name FROM employees WHERE name = 'O''Brien",
+    ],
+)
+def test_parse_errors_are_reported(sql):
+    analysis = analyze_sql(sql, SCHEMA, default_limit=None)
+
+    assert analysis.errors
+    assert analysis.errors[0].startswith("SQL parse error")